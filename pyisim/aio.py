@@ -0,0 +1,650 @@
+import asyncio
+import ssl
+import urllib
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Union
+from urllib.parse import urlencode
+
+import httpx
+from zeep import AsyncClient, Settings
+from zeep.cache import InMemoryCache
+from zeep.transports import AsyncTransport
+
+import pyisim.rest as simrest
+import pyisim.soap as simsoap
+from pyisim import search
+from pyisim.cache import ContainerCache, IdentityMap, cached
+from pyisim.entities import (
+    Access,
+    Account,
+    Activity,
+    Group,
+    OrganizationalContainer,
+    Person,
+    ProvisioningPolicy,
+    Request,
+    Service,
+)
+from pyisim.entities.organizational_container import _load_container
+from pyisim.entities.person import _load_embedded_containers, _lookup_dn
+from pyisim.entities.request import _lookup_request
+from pyisim.response import Response
+from pyisim.search import _check_paged, _next_start, _people_pages
+from pyisim.steps import arun
+
+if TYPE_CHECKING:
+    from pyisim.entities import Role
+    from pyisim.transport import WSDLCache
+
+
+class _RESTReply:
+    # la parte de requests.Response que usan las operaciones REST y Response
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+        self.text = response.text
+        self.content = response.content
+        self.__response = response
+
+    def __bool__(self):
+        return self.status_code < 400
+
+    def json(self):
+        return self.__response.json()
+
+
+class AsyncRESTClient(simrest.BaseClient):
+    """
+    asyncio client for the ISIM REST API, on httpx. The operations are those of pyisim.rest.BaseClient, awaitable.
+    """
+
+    _run = staticmethod(arun)
+
+    def __init__(self, url, user_, pass_, http: httpx.AsyncClient, reauthenticate=True):
+        self.addr = url
+        self.http = http
+        self.reauthenticate = reauthenticate
+        self.CSRF = None
+        self.__credentials = (user_, pass_)
+        self.__login_lock = None
+
+    async def login(self):
+        # una sesión nueva: sin las cookies de la anterior
+        self.http.cookies.clear()
+        self.CSRF = await arun(self._login(self.http.request, *self.__credentials))
+
+    async def _relogin(self, csrf):
+        if self.__login_lock is None:
+            self.__login_lock = asyncio.Lock()
+        async with self.__login_lock:
+            # otra tarea pudo haber renovado la sesión mientras tanto
+            if self.CSRF == csrf:
+                await self.login()
+
+    async def _send(self, method, url, params=None, **kwargs):
+        # mismo formato de parámetros que requests (los str ya vienen codificados)
+        if isinstance(params, dict):
+            params = {k: v for k, v in params.items() if v is not None}
+            params = urlencode(params, doseq=True, quote_via=urllib.parse.quote_plus)
+        if params:
+            url = url + "?" + params
+
+        return _RESTReply(await self.http.request(method, url, **kwargs))
+
+
+class AsyncSOAPClient(simsoap.BaseClient):
+    """
+    asyncio client for the ISIM SOAP API, on zeep's AsyncClient. The operations are those of pyisim.soap.BaseClient, awaitable.
+
+    WSDLs are loaded (synchronously, as zeep does) once at login, in worker threads.
+    """
+
+    _run = staticmethod(arun)
+
+    def __init__(
+        self,
+        url,
+        user_,
+        pass_,
+        http: httpx.AsyncClient,
+        wsdl_http: httpx.Client,
+        wsdl_cache: "WSDLCache" = None,
+        reauthenticate=True,
+    ):
+        self.addr = url + "/itim/services/"
+        self.transport = AsyncTransport(
+            client=http, wsdl_client=wsdl_http, cache=wsdl_cache or InMemoryCache()
+        )
+        self.reauthenticate = reauthenticate
+        self.s = None
+        self._clients = {}
+        # dn del servicio -> perfil de cuenta
+        self._account_profiles = {}
+        # (organización, nombre del flujo) -> DN
+        self._workflows = {}
+        self.__credentials = (user_, pass_)
+        self.__login_lock = None
+
+    async def login(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(None, self.get_client, self.addr + s + "?wsdl")
+                for s in simsoap.SERVICES
+            ]
+        )
+        self.s = await arun(self._login(*self.__credentials))
+
+    async def _relogin(self, session):
+        if self.__login_lock is None:
+            self.__login_lock = asyncio.Lock()
+        async with self.__login_lock:
+            # otra tarea pudo haber renovado la sesión mientras tanto
+            if self.s is session:
+                await self.login()
+
+    def _send(self, client, operation, *args):
+        return client.service[operation](*args)
+
+    def get_client(self, url) -> AsyncClient:
+        # ej. -> https://<ITIMURL>/.../WSSessionService?wsdl -> wssessionservice
+        client_name = url.split("/")[-1][:-5].lower()
+        client = self._clients.get(client_name)
+
+        if client is None:
+            url = self.addr + url.split("/")[-1]
+            client = AsyncClient(
+                url, settings=Settings(strict=False), transport=self.transport
+            )
+            # necesario porque los WSDL de SIM queman el puerto y no funciona con balanceador
+            client.service._binding_options["address"] = url[:-5]
+            self._clients[client_name] = client
+
+        return client
+
+
+class AsyncSearch:
+    """
+    Awaitable versions of the pyisim.search functions. Available as AsyncSession.search.
+
+    Partitioned, lazy and bulk (by value list) searches are only available on Session.
+    """
+
+    def __init__(self, session: "AsyncSession"):
+        self.__session = session
+
+    async def people(
+        self,
+        by="cn",
+        search_filter="*",
+        profile_name="Person",
+        attributes="*",
+        embedded: List[str] = None,
+        roles=False,
+        limit=50,
+    ) -> List[Person]:
+        """
+        Person search. See pyisim.search.people().
+
+        Args:
+            by (str, optional): LDAP Attribute to search by. Defaults to "cn".
+            search_filter (str, optional): Filter to search by. Defaults to "*".
+            profile_name (str, optional): Limits the search scope. Defaults to "Person", which returns both Person and BPPerson entities.
+            attributes (str, optional): Attributes to return in the Person instance. Defaults to "*".
+            embedded (List[str], optional): Attributes to embed as PyISIM entities. Can only support "Person" attributes (ersponsor, manager, etc).
+            roles (bool, optional): If true, returns the roles as embedded PyISIM entities. Defaults to false.
+            limit (int, optional): Defaults to 50.
+
+        Returns:
+            List[Person]: Search results
+        """
+        return await search.people(
+            self.__session,
+            by=by,
+            search_filter=search_filter,
+            profile_name=profile_name,
+            attributes=attributes,
+            embedded=embedded,
+            roles=roles,
+            limit=limit,
+        )
+
+    async def iter_people(
+        self,
+        by="cn",
+        search_filter="*",
+        profile_name="Person",
+        attributes="*",
+        embedded: List[str] = None,
+        page_size=100,
+    ) -> AsyncIterator[Person]:
+        """
+        Paginated person search. See pyisim.search.iter_people(). The next page is requested while the current one is consumed.
+
+        Raises:
+            SizeLimitExceededError: If the server does not page the search and the first page is full.
+
+        Usage::
+
+            async for p in s.search.iter_people(search_filter="Juan*"):
+                ...
+
+        Yields:
+            Person: Search results
+        """
+        session = self.__session
+        fetch = _people_pages(
+            session, by, search_filter, profile_name, attributes, embedded, page_size
+        )
+
+        page, total = await fetch(0)
+        _check_paged(page, total, page_size)
+        start = 0
+        next_page = None
+        try:
+            while True:
+                start = _next_start(page, total, start)
+                if start is not None:
+                    next_page = asyncio.ensure_future(fetch(start))
+
+                await arun(_load_embedded_containers(session, page))
+                for p in page:
+                    yield Person(session, person=p)
+
+                if next_page is None:
+                    break
+                page, total = await next_page
+                next_page = None
+        finally:
+            if next_page:
+                next_page.cancel()
+
+    async def roles(self, by="errolename", search_filter="*") -> List["Role"]:
+        """
+        Role search. See pyisim.search.roles(). Their business units are loaded into the session container cache.
+
+        Returns:
+            List[Role]: Search results. Returns both Dynamic and Static Roles.
+        """
+        return await search.roles(self.__session, by=by, search_filter=search_filter)
+
+    async def activities(
+        self, by="activityName", search_filter="*", max_depth: int = None
+    ) -> List[Activity]:
+        """
+        Pending Activity search. See pyisim.search.activities().
+
+        When searching by requestId the process tree is walked through the SOAP API and the
+        REST data of the activities is then loaded, so every attribute is available without further calls.
+
+        Returns:
+            List[Activity]: Search results
+        """
+        return await search.activities(
+            self.__session, by=by, search_filter=search_filter, max_depth=max_depth
+        )
+
+    async def access(
+        self, by="accessName", search_filter="*", attributes="*", limit=20
+    ) -> List[Access]:
+        """
+        Access search. See pyisim.search.access().
+
+        Returns:
+            List[Access]: Search results
+        """
+        return await search.access(
+            self.__session,
+            by=by,
+            search_filter=search_filter,
+            attributes=attributes,
+            limit=limit,
+        )
+
+    async def service(
+        self,
+        parent: OrganizationalContainer,
+        by="erservicename",
+        search_filter="*",
+    ) -> List[Service]:
+        """
+        Service search. See pyisim.search.service().
+
+        Returns:
+            List[Service]: Search results
+        """
+        return await search.service(
+            self.__session, parent, by=by, search_filter=search_filter
+        )
+
+    async def organizational_container(
+        self, profile_name: str, search_filter: str, by="name"
+    ) -> List[OrganizationalContainer]:
+        """
+        Organizational container search. See pyisim.search.organizational_container().
+
+        Returns:
+            List[OrganizationalContainer]: Search results.
+        """
+        return await search.organizational_container(
+            self.__session, profile_name, search_filter, by=by
+        )
+
+    async def account(
+        self, ldap_search_filter: str, service: Service = None
+    ) -> List[Account]:
+        """
+        Account search. See pyisim.search.account().
+
+        Returns:
+            List[Account]: Search results
+        """
+        return await search.account(self.__session, ldap_search_filter, service=service)
+
+    async def groups(
+        self,
+        by: str,
+        service_dn: str = None,
+        group_profile_name="",
+        group_info="",
+    ) -> List[Group]:
+        """
+        Service group search. See pyisim.search.groups().
+
+        Returns:
+            List[Group]: Search results
+        """
+        return await search.groups(
+            self.__session,
+            by,
+            service_dn=service_dn,
+            group_profile_name=group_profile_name,
+            group_info=group_info,
+        )
+
+    async def provisioning_policy(
+        self, name: str, parent: OrganizationalContainer
+    ) -> List[ProvisioningPolicy]:
+        """
+        Provisioning Policy search. See pyisim.search.provisioning_policy().
+
+        Returns:
+            List[ProvisioningPolicy]: Search results
+        """
+        return await search.provisioning_policy(self.__session, name, parent)
+
+
+class AsyncSession:
+    """
+    asyncio interface for the IBM Security Identity Manager application.
+
+    REST calls go through httpx and SOAP calls through zeep's AsyncClient, over one shared
+    connection pool of max_concurrency connections: a single event loop keeps up to that many calls in flight.
+    Requires the async extra (pip install pyisim[async]).
+
+    Searches are available in AsyncSession.search, and entity operations (which in Session are
+    entity methods) as AsyncSession methods taking the entity. The entity methods can also be
+    awaited directly, passing the AsyncSession (ex. await person.suspend(s, "...")).
+    Entities returned by an AsyncSession come with everything they reference already loaded.
+    Role and provisioning policy changes, partitioned, lazy and bulk searches are only available on Session.
+
+    Usage::
+
+        async with AsyncSession(url, user, password, cert) as s:
+            people = await s.search.people(by="cn", search_filter="Juan*")
+            accounts = await asyncio.gather(*[s.get_accounts(p) for p in people])
+    """
+
+    # las operaciones compartidas (pyisim.steps) corren en el event loop
+    _run = staticmethod(arun)
+
+    def __init__(
+        self,
+        url: str,
+        username: str,
+        password: str,
+        certificate_path: str,
+        max_concurrency: int = 50,
+        wsdl_cache: "WSDLCache" = None,
+        reauthenticate: bool = True,
+        identity_map: IdentityMap = None,
+    ):
+        """
+        Args:
+            url (str): ISIM Base URL. Example: https://iam.isim.com:9082
+            username (str): Login name of user
+            password (str): User password
+            certificate_path (str): Path to application server root certificate. Example: "./MyCA.cer"
+            max_concurrency (int, optional): Maximum ISIM calls in flight. Further calls wait for a free connection. Defaults to 50.
+            wsdl_cache (WSDLCache, optional): Persistent WSDL/XSD cache. Defaults to None (in-memory cache only).
+            reauthenticate (bool, optional): When the server-side session expires, log in again once and replay the failed call. Defaults to True.
+            identity_map (IdentityMap, optional): Map of entities by DN/href, see Session. Defaults to None (no sharing).
+        """
+        self.url = url
+        self.username = username
+        self.certificate_path = certificate_path
+        self.max_concurrency = max_concurrency
+        self.identity_map = identity_map
+        self.container_cache = ContainerCache()
+        self.search = AsyncSearch(self)
+
+        verify = ssl.create_default_context(cafile=certificate_path)
+        # un solo pool de conexiones para REST y SOAP; cada cliente tiene sus cookies
+        self.transport = httpx.AsyncHTTPTransport(
+            verify=verify,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        # sin timeout de pool: con todas las conexiones ocupadas, las llamadas esperan su turno
+        timeout = httpx.Timeout(300, pool=None)
+        rest_http = httpx.AsyncClient(
+            transport=self.transport, timeout=timeout, follow_redirects=True
+        )
+        soap_http = httpx.AsyncClient(transport=self.transport, timeout=timeout)
+        wsdl_http = httpx.Client(verify=verify, timeout=300)
+
+        self.restclient = AsyncRESTClient(
+            url, username, password, rest_http, reauthenticate=reauthenticate
+        )
+        self.soapclient = AsyncSOAPClient(
+            url,
+            username,
+            password,
+            soap_http,
+            wsdl_http,
+            wsdl_cache=wsdl_cache,
+            reauthenticate=reauthenticate,
+        )
+
+    async def login(self) -> "AsyncSession":
+        """
+        Performs login on both ISIM APIs concurrently.
+
+        Returns:
+            AsyncSession: This session, logged in.
+        """
+        await asyncio.gather(self.restclient.login(), self.soapclient.login())
+        return self
+
+    async def close(self) -> None:
+        """
+        Closes the pooled connections.
+        """
+        await self.restclient.http.aclose()
+        await self.soapclient.transport.client.aclose()
+        self.soapclient.transport.wsdl_client.close()
+
+    async def __aenter__(self) -> "AsyncSession":
+        return await self.login()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def lookup_person(self, dn: str) -> Person:
+        """
+        Person lookup by DN.
+
+        Args:
+            dn (str): Person DN
+
+        Returns:
+            Person: Person with every attribute.
+        """
+        r = await arun(_lookup_dn(self, dn))
+        r["_attributes"]["dn"] = dn
+        return Person(self, person=r)
+
+    async def lookup_request(self, id: str) -> Request:
+        """
+        Request lookup by id.
+
+        Args:
+            id (str): Request id
+
+        Returns:
+            Request: The request.
+        """
+        return Request(self, request=await arun(_lookup_request(self, id)))
+
+    async def organizational_container(self, dn: str) -> OrganizationalContainer:
+        """
+        Organizational container lookup by DN. Uses the session container cache.
+
+        Args:
+            dn (str): Organizational container DN
+
+        Returns:
+            OrganizationalContainer: The container.
+        """
+        await arun(_load_container(self, dn=dn))
+        return cached(
+            self,
+            "OrganizationalContainer",
+            dn,
+            lambda: OrganizationalContainer(self, dn=dn),
+        )
+
+    async def add_person(
+        self, person: Person, parent: OrganizationalContainer, justification: str
+    ) -> Response:
+        """
+        Requests to add the person into ISIM. See Person.add().
+        """
+        return await person.add(self, parent, justification)
+
+    async def modify_person(
+        self, person: Person, justification: str, changes: dict = None
+    ) -> Response:
+        """
+        Requests to modify the person. See Person.modify().
+        """
+        return await person.modify(self, justification, changes or {})
+
+    async def request_access(
+        self, person: Person, accesses: List[Access], justification: str
+    ) -> Response:
+        """
+        Requests access to the person. See Person.request_access().
+        """
+        return await person.request_access(self, accesses, justification)
+
+    async def suspend_person(
+        self, person: Person, justification: str, suspend_accounts: bool = False
+    ) -> Response:
+        """
+        Requests to suspend the person. See Person.suspend().
+        """
+        return await person.suspend(self, justification, suspend_accounts)
+
+    async def restore_person(
+        self,
+        person: Person,
+        justification: str,
+        restore_accounts: bool = False,
+        password: str = None,
+    ) -> Response:
+        """
+        Requests to restore the person. See Person.restore().
+        """
+        return await person.restore(self, justification, restore_accounts, password)
+
+    async def delete_person(self, person: Person, justification: str) -> Response:
+        """
+        Requests to delete the person. See Person.delete().
+        """
+        return await person.delete(self, justification)
+
+    async def get_accounts(self, person: Person) -> List[Account]:
+        """
+        Retrieves all registered accounts of the person. See Person.get_accounts().
+        """
+        return await person.get_accounts(self)
+
+    async def add_account(
+        self, account: Account, owner: Person, service: Service, justification: str
+    ) -> Response:
+        """
+        Requests to add the account. See Account.add().
+        """
+        return await account.add(self, owner, service, justification)
+
+    async def modify_account(
+        self, account: Account, justification: str, changes: dict = None
+    ) -> Response:
+        """
+        Requests to modify the account. See Account.modify().
+        """
+        return await account.modify(self, justification, changes or {})
+
+    async def suspend_account(self, account: Account, justification: str) -> Response:
+        """
+        Requests to suspend the account. See Account.suspend().
+        """
+        return await account.suspend(self, justification)
+
+    async def restore_account(
+        self, account: Account, password: str, justification: str
+    ) -> Response:
+        """
+        Requests to restore the account. See Account.restore().
+        """
+        return await account.restore(self, password, justification)
+
+    async def delete_account(self, account: Account, justification: str) -> Response:
+        """
+        Requests to deprovision the account. See Account.delete().
+        """
+        return await account.delete(self, justification)
+
+    async def orphan_account(self, account: Account) -> None:
+        """
+        Requests to orphan the account. See Account.orphan().
+        """
+        await account.orphan(self)
+
+    async def complete_activity(
+        self,
+        activity: Activity,
+        result: Union[str, List[Dict[str, str]]],
+        justification: str,
+    ) -> Response:
+        """
+        Completes the activity. See Activity.complete().
+        """
+        return await activity.complete(self, result, justification)
+
+    async def get_pending_activities(
+        self, request: Request, max_depth: int = None
+    ) -> List[Activity]:
+        """
+        Gets the request pending activities. See Request.get_pending_activities().
+        """
+        return await request.get_pending_activities(self, max_depth=max_depth)
+
+    async def abort_request(self, request: Request, justification: str) -> None:
+        """
+        Aborts the request. See Request.abort().
+        """
+        await request.abort(self, justification)
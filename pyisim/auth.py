@@ -1,6 +1,20 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Union
+
+import requests
+
 import pyisim.rest as simrest
 import pyisim.soap as simsoap
+from pyisim.balancer import BalancedClient, NodeBalancer, connection_refused
+from pyisim.cache import ContainerCache, IdentityMap
+from pyisim.limiter import ConcurrencyLimiter
 from pyisim.entities import Person
+from pyisim.transport import ConnectionPool, WSDLCache
 
 
 class Session:
@@ -8,19 +22,213 @@ class Session:
     Handles user session for the IBM Security Identity Manager application
     """
 
-    def __init__(self, url: str, username: str, password: str, certificate_path: str):
+    def __init__(
+        self,
+        url: Union[str, List[str]],
+        username: str,
+        password: str,
+        certificate_path: str,
+        pool: ConnectionPool = None,
+        wsdl_cache: WSDLCache = None,
+        preload: Union[str, List[str]] = None,
+        lazy: bool = False,
+        session_file: str = None,
+        reauthenticate: bool = True,
+        balancing: str = "round_robin",
+        limiter: ConcurrencyLimiter = None,
+        identity_map: IdentityMap = None,
+    ):
         """
         Performs login on specified ISIM URL
 
         Args:
-            url (str): ISIM Base URL. Example: https://iam.isim.com:9082
+            url (Union[str, List[str]]): ISIM Base URL. Example: https://iam.isim.com:9082. A list of cluster member URLs balances calls between them. Members that refuse connections at login are ejected, login only fails if none of them answers.
             username (str): Login name of user
             password (str): User password
             certificate_path (str): Path to application server root certificate. Example: "./MyCA.cer"
+            pool (ConnectionPool, optional): HTTP connection pool shared by the REST and SOAP clients. Defaults to a new pool with default sizes.
+            wsdl_cache (WSDLCache, optional): Persistent WSDL/XSD cache. Defaults to None (in-memory cache only).
+            preload (Union[str, List[str]], optional): SOAP services to load concurrently at login, or "all". See pyisim.soap.SERVICES. Defaults to None (services load on first use).
+            lazy (bool, optional): Delay each API login (REST / SOAP) until its client is first used, so scripts that only use one API skip the other one's login. Defaults to False.
+            session_file (str, optional): File written by Session.save(). If it holds a session for the same URL and user that is still valid on the server, it is resumed instead of logging in again. Defaults to None.
+            reauthenticate (bool, optional): When the server-side session expires, log in again once and replay the failed call. Defaults to True.
+            balancing (str, optional): With several URLs, "round_robin" or "least_outstanding". Each node keeps its own REST cookies and SOAP WSSession. Defaults to "round_robin".
+            limiter (ConcurrencyLimiter, optional): Adaptive limit on REST and SOAP calls in flight. Defaults to None (no limit).
+            identity_map (IdentityMap, optional): Map of entities by DN/href, so entities referenced by others (managers, business units, roles) are built once. Defaults to None (no sharing).
         """
+        self.nodes = [url] if isinstance(url, str) else list(url)
+        self.url = self.nodes[0]
         self.username = username
-        self.restclient = simrest.ISIMClient(url, username, password, certificate_path)
-        self.soapclient = simsoap.ISIMClient(url, username, password, certificate_path)
+        self._password = password
+        self.certificate_path = certificate_path
+        self.pool = pool or ConnectionPool()
+        self.wsdl_cache = wsdl_cache
+        self.preload = preload
+        self.session_file = session_file
+        self.reauthenticate = reauthenticate
+        self.limiter = limiter
+        self.identity_map = identity_map
+        # datos de los contenedores organizacionales (casi nunca cambian)
+        self.container_cache = ContainerCache()
+        self._saved_state = self.__read_state(session_file)
+
+        # clientes por nodo
+        self._restclients = {}
+        self._soapclients = {}
+        self._rest_lock = threading.Lock()
+        self._soap_lock = threading.Lock()
+
+        self.balancer = None
+        if len(self.nodes) > 1:
+            self.balancer = NodeBalancer(self.nodes, strategy=balancing)
+            self._rest_proxy = BalancedClient(
+                self.balancer, self._get_restclient, simrest.ISIMClient
+            )
+            self._soap_proxy = BalancedClient(
+                self.balancer, self._get_soapclient, simsoap.ISIMClient
+            )
+
+        if not lazy:
+            self.__login_nodes()
+
+    @property
+    def restclient(self) -> simrest.ISIMClient:
+        """
+        ISIM REST API client. Logs in on first use.
+        """
+        if self.balancer:
+            return self._rest_proxy
+        return self._get_restclient(self.url)
+
+    @property
+    def soapclient(self) -> simsoap.ISIMClient:
+        """
+        ISIM SOAP API client. Logs in (and preloads the requested services) on first use.
+        """
+        if self.balancer:
+            return self._soap_proxy
+        return self._get_soapclient(self.url)
+
+    def _get_restclient(self, node: str) -> simrest.ISIMClient:
+        client = self._restclients.get(node)
+        if client is None:
+            with self._rest_lock:
+                client = self._restclients.get(node)
+                if client is None:
+                    client = simrest.ISIMClient(
+                        node,
+                        self.username,
+                        self._password,
+                        self.certificate_path,
+                        pool=self.pool,
+                        state=self.__node_state(node).get("rest"),
+                        reauthenticate=self.reauthenticate,
+                        limiter=self.limiter,
+                    )
+                    self._restclients[node] = client
+        return client
+
+    def _get_soapclient(self, node: str) -> simsoap.ISIMClient:
+        client = self._soapclients.get(node)
+        if client is None:
+            with self._soap_lock:
+                client = self._soapclients.get(node)
+                if client is None:
+                    client = simsoap.ISIMClient(
+                        node,
+                        self.username,
+                        self._password,
+                        self.certificate_path,
+                        pool=self.pool,
+                        wsdl_cache=self.wsdl_cache,
+                        state=self.__node_state(node).get("soap"),
+                        reauthenticate=self.reauthenticate,
+                        limiter=self.limiter,
+                    )
+                    if self.preload:
+                        client.preload(self.preload)
+                    self._soapclients[node] = client
+        return client
+
+    def __login_nodes(self) -> None:
+        # un nodo caído se expulsa y la sesión usa el resto; solo falla si no responde ninguno
+        refused = []
+        for node in self.nodes:
+            try:
+                self._get_restclient(node)
+                self._get_soapclient(node)
+            except requests.exceptions.ConnectionError as e:
+                if self.balancer is None or not connection_refused(e):
+                    raise
+                self.balancer.eject(node)
+                refused.append(e)
+
+        if len(refused) == len(self.nodes):
+            raise refused[-1]
+
+    def __node_state(self, node: str) -> dict:
+        return self._saved_state.get("nodes", {}).get(node, {})
+
+    def __read_state(self, path: str) -> dict:
+        if not path or not os.path.isfile(path):
+            return {}
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if state.get("url") != self.nodes or state.get("username") != self.username:
+            return {}
+        return state
+
+    def save(self, path: str = None) -> None:
+        """
+        Saves the session cookies, CSRF token and SOAP WSSession to a file readable only by the current user,
+        so another process can resume the session with Session(..., session_file=path).
+
+        The password is never written. Clients that have not logged in yet (lazy sessions) are not saved.
+
+        Args:
+            path (str, optional): Destination file. Defaults to the session_file the Session was created with.
+        """
+        path = path or self.session_file
+        if not path:
+            raise ValueError("No session file specified.")
+
+        nodes = {}
+        for node, client in list(self._restclients.items()):
+            nodes.setdefault(node, {})["rest"] = client.export_state()
+        for node, client in list(self._soapclients.items()):
+            nodes.setdefault(node, {})["soap"] = client.export_state()
+        state = {"url": self.nodes, "username": self.username, "nodes": nodes}
+
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(path, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def is_alive(self) -> bool:
+        """
+        Checks that the server-side sessions of the clients already logged in are still valid.
+        Costs one request per logged in API (and node).
+
+        Returns:
+            bool: False if any of them expired.
+        """
+        clients = list(self._restclients.values()) + list(self._soapclients.values())
+        return all(c.is_alive() for c in clients)
+
+    def preload_containers(self) -> int:
+        """
+        Loads every organizational container into the session cache in a few calls,
+        so roles, provisioning policies and other entities resolve their business unit without extra requests.
+
+        Returns:
+            int: Number of containers loaded.
+        """
+        return self.container_cache.preload(self)
 
     def current_person(self, attributes="*") -> Person:
         """Returns the current logged in person entity.
@@ -33,3 +241,157 @@ class Session:
         """
         p = self.restclient.lookup_current_person(attributes, "")
         return Person(self, person=p)
+
+
+class SessionPool:
+    """
+    Pool of authenticated ISIM sessions shared by worker threads.
+
+    Sessions are logged in lazily, up to max_size, and handed out with checkout/checkin semantics.
+    Idle sessions are health-checked before being handed out again and replaced if they expired.
+
+    Usage::
+
+        pool = SessionPool(url, user, password, cert, max_size=4)
+        with pool.session() as s:
+            search.people(s, ...)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        username: str,
+        password: str,
+        certificate_path: str,
+        max_size: int = 4,
+        health_check_interval: float = 60,
+        **session_options,
+    ):
+        """
+        Args:
+            url (str): ISIM Base URL. Example: https://iam.isim.com:9082
+            username (str): Login name of user
+            password (str): User password
+            certificate_path (str): Path to application server root certificate. Example: "./MyCA.cer"
+            max_size (int, optional): Maximum number of sessions logged in at the same time. Defaults to 4.
+            health_check_interval (float, optional): Seconds a session can stay idle before it is health-checked on checkout. None disables health checks. Defaults to 60.
+            session_options: Extra keyword arguments for every Session (pool, wsdl_cache, preload, lazy, ...). A single ConnectionPool is shared by all sessions unless one is given.
+        """
+        session_options.setdefault("pool", ConnectionPool(pool_maxsize=max_size))
+
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+
+        self.__login_args = (url, username, password, certificate_path)
+        self.__session_options = session_options
+        self.__idle = deque()  # (session, idle since)
+        self.__cond = threading.Condition()
+        self.__created = 0
+        self.__in_use = 0
+        self.__waiting = 0
+        self.__checkouts = 0
+        self.__replaced = 0
+
+    def checkout(self, timeout: float = None) -> Session:
+        """
+        Takes a session from the pool, logging in a new one if none is idle and the pool is not full.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free session when the pool is full. Waits forever if None. Defaults to None.
+
+        Raises:
+            TimeoutError: No session was released in time.
+
+        Returns:
+            Session: Authenticated session. Must be returned with checkin().
+        """
+        with self.__cond:
+            self.__waiting += 1
+            try:
+                # un solo plazo: despertar sin obtener sesión no reinicia la espera
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while not self.__idle and self.__created >= self.max_size:
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No ISIM session was released in time.")
+                    self.__cond.wait(remaining)
+            finally:
+                self.__waiting -= 1
+
+            if self.__idle:
+                session, idle_since = self.__idle.pop()
+            else:
+                session, idle_since = None, None
+                self.__created += 1
+            self.__in_use += 1
+            self.__checkouts += 1
+
+        try:
+            if session is None:
+                session = self.__new_session()
+            elif self.__needs_check(idle_since) and not session.is_alive():
+                session = self.__new_session()
+                with self.__cond:
+                    self.__replaced += 1
+        except BaseException:
+            with self.__cond:
+                self.__created -= 1
+                self.__in_use -= 1
+                self.__cond.notify()
+            raise
+
+        return session
+
+    def checkin(self, session: Session) -> None:
+        """
+        Returns a session to the pool.
+
+        Args:
+            session (Session): Session obtained with checkout().
+        """
+        with self.__cond:
+            self.__in_use -= 1
+            self.__idle.append((session, time.monotonic()))
+            self.__cond.notify()
+
+    @contextmanager
+    def session(self, timeout: float = None) -> Iterator[Session]:
+        """
+        Context manager that checks a session out and back in.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free session. Defaults to None.
+        """
+        session = self.checkout(timeout)
+        try:
+            yield session
+        finally:
+            self.checkin(session)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Pool utilisation.
+
+        Returns:
+            Dict[str, int]: max_size, created, in_use, idle, waiting, checkouts and replaced (expired sessions logged in again).
+        """
+        with self.__cond:
+            return {
+                "max_size": self.max_size,
+                "created": self.__created,
+                "in_use": self.__in_use,
+                "idle": len(self.__idle),
+                "waiting": self.__waiting,
+                "checkouts": self.__checkouts,
+                "replaced": self.__replaced,
+            }
+
+    def __new_session(self) -> Session:
+        return Session(*self.__login_args, **self.__session_options)
+
+    def __needs_check(self, idle_since: float) -> bool:
+        if self.health_check_interval is None:
+            return False
+        return time.monotonic() - idle_since >= self.health_check_interval
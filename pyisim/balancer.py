@@ -0,0 +1,173 @@
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+STRATEGIES = ("round_robin", "least_outstanding")
+
+
+class NodeBalancer:
+    """
+    Chooses the ISIM cluster member (node) that serves each call.
+
+    Nodes that refuse connections are ejected for a cooldown period and traffic is spread
+    over the remaining ones.
+    """
+
+    def __init__(
+        self, nodes: List[str], strategy: str = "round_robin", cooldown: float = 30
+    ):
+        """
+        Args:
+            nodes (List[str]): ISIM Base URLs of every cluster member.
+            strategy (str, optional): "round_robin" or "least_outstanding" (node with the fewest calls in flight). Defaults to "round_robin".
+            cooldown (float, optional): Seconds an unreachable node stays ejected. Defaults to 30.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Invalid strategy. Options: {STRATEGIES}")
+        if not nodes:
+            raise ValueError("At least one node is required.")
+
+        self.nodes = list(nodes)
+        self.strategy = strategy
+        self.cooldown = cooldown
+
+        self.__lock = threading.Lock()
+        self.__next = 0
+        self.__outstanding = {n: 0 for n in self.nodes}
+        self.__calls = {n: 0 for n in self.nodes}
+        self.__ejected_until = {n: 0.0 for n in self.nodes}
+
+    def pick(self, exclude=()) -> str:
+        """
+        Chooses the node for the next call and counts it as outstanding until release() is called.
+
+        Args:
+            exclude (Iterable[str], optional): Nodes not to choose (already failed for this call).
+
+        Raises:
+            ConnectionError: Every node was excluded.
+
+        Returns:
+            str: Node URL.
+        """
+        with self.__lock:
+            candidates = [n for n in self.nodes if n not in exclude]
+            if not candidates:
+                raise ConnectionError("No ISIM node available.")
+
+            now = time.monotonic()
+            healthy = [n for n in candidates if self.__ejected_until[n] <= now]
+            # si todos están expulsados se prueba igual, alguno pudo haberse recuperado
+            candidates = healthy or candidates
+
+            if self.strategy == "least_outstanding":
+                node = min(candidates, key=lambda n: self.__outstanding[n])
+            else:
+                # siguiente nodo disponible en el orden del clúster
+                total = len(self.nodes)
+                order = (self.nodes[(self.__next + i) % total] for i in range(total))
+                node = next(n for n in order if n in candidates)
+                self.__next = (self.nodes.index(node) + 1) % total
+
+            self.__outstanding[node] += 1
+            self.__calls[node] += 1
+            return node
+
+    def release(self, node: str) -> None:
+        """
+        Marks a call picked with pick() as finished.
+        """
+        with self.__lock:
+            self.__outstanding[node] -= 1
+
+    def eject(self, node: str) -> None:
+        """
+        Stops routing calls to the node until the cooldown expires.
+        """
+        with self.__lock:
+            self.__ejected_until[node] = time.monotonic() + self.cooldown
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            Dict[str, Dict[str, Any]]: Per node: outstanding calls, total calls and whether it is ejected.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            return {
+                n: {
+                    "outstanding": self.__outstanding[n],
+                    "calls": self.__calls[n],
+                    "ejected": self.__ejected_until[n] > now,
+                }
+                for n in self.nodes
+            }
+
+
+def connection_refused(e: Exception) -> bool:
+    """
+    True if the request never reached the node (safe to retry on another one).
+    """
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(e, requests.exceptions.ConnectionError) and e.args:
+        return isinstance(getattr(e.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+class BalancedClient:
+    """
+    Stands in for a low-level REST or SOAP client and routes every method call to a node
+    chosen by the balancer, using that node's own client (cookies, CSRF token, WSSession).
+
+    Calls that cannot connect eject the node and are retried on the next one.
+    """
+
+    def __init__(
+        self,
+        balancer: NodeBalancer,
+        get_client: Callable[[str], Any],
+        client_class: type,
+    ):
+        """
+        Args:
+            balancer (NodeBalancer): Node balancer.
+            get_client (Callable[[str], Any]): Returns the (logged in) client of a node.
+            client_class (type): Low-level client class (pyisim.rest.ISIMClient or pyisim.soap.ISIMClient).
+        """
+        self.__balancer = balancer
+        self.__get_client = get_client
+        self.__client_class = client_class
+
+    def __getattr__(self, name: str) -> Any:
+        if callable(getattr(self.__client_class, name, None)):
+            return functools.partial(self.__call, name)
+
+        # atributos de instancia (addr, CSRF, ...): se leen de cualquier nodo disponible
+        node = self.__balancer.pick()
+        try:
+            return getattr(self.__get_client(node), name)
+        finally:
+            self.__balancer.release(node)
+
+    def __call(self, name: str, *args, **kwargs) -> Any:
+        failed = []
+        while True:
+            node = self.__balancer.pick(exclude=failed)
+            try:
+                client = self.__get_client(node)
+                return getattr(client, name)(*args, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # un error a mitad de la llamada no significa que el nodo esté caído
+                if not connection_refused(e):
+                    raise
+                self.__balancer.eject(node)
+                failed.append(node)
+                if len(failed) == len(self.__balancer.nodes):
+                    raise
+            finally:
+                self.__balancer.release(node)
@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    from pyisim.auth import Session
+
+T = TypeVar("T")
+
+# categorías REST de contenedores organizacionales, por perfil SOAP
+CONTAINER_CATEGORIES = {
+    "BusinessPartnerOrganization": "bporganizations",
+    "OrganizationalUnit": "organizationunits",
+    "Organization": "organizations",
+    "Location": "locations",
+    "AdminDomain": "admindomains",
+}
+
+# segundos que vive cada tipo de entidad en el mapa
+DEFAULT_TTL = {
+    "OrganizationalContainer": 3600,
+    "Role": 600,
+    "Person": 120,
+}
+
+
+class IdentityMap:
+    """
+    Session-scoped map of already built entities, keyed by DN or href.
+
+    Entities that reference other directory objects (a person's manager, a role's business
+    unit, ...) get the same instance every time instead of fetching and rebuilding it.
+    Entries expire after a per-type TTL and the least recently used are evicted beyond max_size.
+
+    Usage::
+
+        s = Session(url, user, password, cert, identity_map=IdentityMap())
+        ...
+        s.identity_map.stats()
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: Dict[str, float] = None,
+        default_ttl: float = 300,
+    ):
+        """
+        Args:
+            max_size (int, optional): Maximum number of entries. Defaults to 10000.
+            ttl (Dict[str, float], optional): Seconds entries live, per entity type (class name, ex. "Person"). Merged over DEFAULT_TTL.
+            default_ttl (float, optional): Seconds entries of types not in ttl live. Defaults to 300.
+        """
+        self.max_size = max_size
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.default_ttl = default_ttl
+
+        self.__entries: "OrderedDict[Tuple[str, str], Tuple[Any, float]]" = (
+            OrderedDict()
+        )
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def get(self, kind: str, key: str) -> Any:
+        """
+        Args:
+            kind (str): Entity type (class name).
+            key (str): DN or href.
+
+        Returns:
+            Any: The entity, or None if it is not in the map or expired.
+        """
+        k = (kind, key.lower())
+        with self.__lock:
+            entry = self.__entries.get(k)
+            if entry is None or entry[1] <= time.monotonic():
+                self.__entries.pop(k, None)
+                self.__misses += 1
+                return None
+
+            self.__entries.move_to_end(k)
+            self.__hits += 1
+            return entry[0]
+
+    def put(self, kind: str, key: str, entity: Any) -> None:
+        """
+        Stores the entity under the key, and also under its DN and href if it has them.
+
+        Args:
+            kind (str): Entity type (class name).
+            key (str): DN or href.
+            entity (Any): PyISIM entity.
+        """
+        expires = time.monotonic() + self.ttl.get(kind, self.default_ttl)
+        # vars(): no dispara la carga de atributos de entidades perezosas
+        keys = {key, vars(entity).get("dn"), vars(entity).get("href")}
+
+        with self.__lock:
+            for k in keys:
+                if k:
+                    self.__entries[(kind, k.lower())] = (entity, expires)
+                    self.__entries.move_to_end((kind, k.lower()))
+
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    def get_or_create(self, kind: str, key: str, factory: Callable[[], T]) -> T:
+        """
+        Returns the entity stored under the key, building and storing it with factory() on a miss.
+        """
+        entity = self.get(kind, key)
+        if entity is None:
+            entity = factory()
+            self.put(kind, key, entity)
+        return entity
+
+    def invalidate(self, key: str = None) -> None:
+        """
+        Removes the entities of a DN or href (of any type), with every other key they are stored
+        under (ex. the href of a person invalidated by DN), or every entry if key is None.
+        """
+        with self.__lock:
+            if key is None:
+                self.__entries.clear()
+                return
+            entities = {
+                id(e) for k, (e, _) in self.__entries.items() if k[1] == key.lower()
+            }
+            for k in [k for k, (e, _) in self.__entries.items() if id(e) in entities]:
+                del self.__entries[k]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: size, hits, misses and evictions.
+        """
+        with self.__lock:
+            return {
+                "size": len(self.__entries),
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+            }
+
+
+def cached(session: "Session", kind: str, key: str, factory: Callable[[], T]) -> T:
+    """
+    Resolves a referenced entity through the session identity map, if it has one.
+    """
+    identity_map = getattr(session, "identity_map", None)
+    if identity_map is None or not key:
+        return factory()
+    return identity_map.get_or_create(kind, key, factory)
+
+
+class ContainerCache:
+    """
+    Per-session cache of organizational container (business unit) data: the SOAP
+    WSOrganizationalContainer and REST href of each container DN.
+
+    OrganizationalContainer uses it so the same containers are looked up only once.
+    preload() fills it with the whole container tree in a handful of calls.
+    """
+
+    def __init__(self):
+        self.__by_dn: Dict[str, Dict[str, Any]] = {}
+        self.__dn_by_href: Dict[str, str] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, dn: str) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Known data of the container ("wsou", "href"). Empty if unknown.
+        """
+        with self.__lock:
+            return dict(self.__by_dn.get(dn.lower(), {}))
+
+    def dn_for(self, href: str) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: DN of the container with this REST href, if known.
+        """
+        with self.__lock:
+            return self.__dn_by_href.get(href)
+
+    def put(self, dn: str, wsou=None, href: str = None) -> None:
+        """
+        Stores (or completes) the data of a container.
+        """
+        with self.__lock:
+            entry = self.__by_dn.setdefault(dn.lower(), {})
+            if wsou is not None:
+                entry["wsou"] = wsou
+            if href:
+                entry["href"] = href
+                self.__dn_by_href[href] = dn
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__by_dn.clear()
+            self.__dn_by_href.clear()
+
+    def preload(self, session: "Session") -> int:
+        """
+        Loads every container: one SOAP getOrganizationTree call plus one REST search per container category.
+
+        Args:
+            session (Session): Active ISIM Session
+
+        Returns:
+            int: Number of containers loaded.
+        """
+        ous = session.soapclient.get_organization_tree()
+        for ou in ous:
+            self.put(ou["itimDN"], wsou=ou)
+
+        for category in CONTAINER_CATEGORIES.values():
+            found = session.restclient.search_containers(
+                category, "*", attributes="dn", limit=10000
+            )
+            for ou in found:
+                dn = ou.get("_attributes", {}).get("dn")
+                if dn:
+                    self.put(dn, href=ou["_links"]["self"]["href"])
+
+        return len(ous)
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 from .person import Person
+from ..cache import cached
 
 if TYPE_CHECKING:
     from ..auth import Session
@@ -43,7 +44,15 @@ class Access:
     def get_owners(self, session: "Session"):
         id = self.href.split("/")[-1]
         owners = session.restclient.get_access_owners(id)
-        return [Person(session, o) for o in owners]
+        return [
+            cached(
+                session,
+                "Person",
+                o["_links"]["self"]["href"],
+                lambda: Person(session, o),
+            )
+            for o in owners
+        ]
 
     def __eq__(self, o: object) -> bool:
         if type(o) is type(self):
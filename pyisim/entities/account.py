@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 
 from ..response import Response
+from ..steps import Call, operation
 
 if TYPE_CHECKING:
     from pyisim.auth import Session
@@ -9,6 +10,32 @@ if TYPE_CHECKING:
     from .service import Service
 
 
+def create_wsattrs(attrs: dict) -> list:
+    """
+    Creates a WSAttributes[]-compatible object from a dictionary of attributes
+
+    Args:
+        attrs (dict): Account attributes
+
+    Returns:
+        list: List of WSAttributes
+    """
+
+    wsattrs = []
+    for name, value in attrs.items():
+        if name != "changes":
+            wsattrs.append(
+                {
+                    "name": name,
+                    "operation": 0,
+                    "values": {"item": value if isinstance(value, list) else [value]},
+                    "isEncoded": False,
+                }
+            )
+
+    return wsattrs
+
+
 class Account:
     def __init__(
         self,
@@ -43,6 +70,7 @@ class Account:
         for k, v in account_attrs.items():
             setattr(self, k, v)
 
+    @operation(runner=1)
     def add(
         self,
         session: "Session",
@@ -64,11 +92,11 @@ class Account:
         """
 
         attrs = self.__dict__
-        attrs["owner"] = owner.dn
-        wsattrs = self.__create_wsattrs(attrs)
+        attrs["owner"] = yield Call(owner.get_dn, session)
+        wsattrs = create_wsattrs(attrs)
 
-        wsrequest = session.soapclient.create_account(
-            service.dn, wsattrs, None, justification
+        wsrequest = yield Call(
+            session.soapclient.create_account, service.dn, wsattrs, None, justification
         )
 
         return Response(session, wsrequest)
@@ -78,33 +106,7 @@ class Account:
             self.changes[attr] = val
         super().__setattr__(attr, val)
 
-    def __create_wsattrs(self, attrs: dict) -> list:
-        """
-        Creates a WSAttributes[]-compatible object from a dictionary of attributes
-
-        Args:
-            attrs (dict): Account attributes
-
-        Returns:
-            list: List of WSAttributes
-        """
-
-        wsattrs = []
-        for name, value in attrs.items():
-            if name != "changes":
-                wsattrs.append(
-                    {
-                        "name": name,
-                        "operation": 0,
-                        "values": {
-                            "item": value if isinstance(value, list) else [value]
-                        },
-                        "isEncoded": False,
-                    }
-                )
-
-        return wsattrs
-
+    @operation(runner=1)
     def modify(self, session: "Session", justification: str, changes={}) -> Response:
         """
         Requests to modify the account.
@@ -122,10 +124,10 @@ class Account:
         try:
 
             self.changes.update(changes)
-            wsattrs = self.__create_wsattrs(self.changes)
+            wsattrs = create_wsattrs(self.changes)
 
-            wsrequest = session.soapclient.modify_account(
-                self.dn, wsattrs, None, justification
+            wsrequest = yield Call(
+                session.soapclient.modify_account, self.dn, wsattrs, None, justification
             )
             return Response(session, wsrequest)
         except AttributeError:
@@ -133,6 +135,7 @@ class Account:
                 "Account has no reference to ISIM, search for it or initialize it with href to link it."
             )
 
+    @operation(runner=1)
     def suspend(self, session: "Session", justification: str) -> Response:
         """
         Request to suspend the specified account
@@ -145,13 +148,16 @@ class Account:
             Response: ISIM API Response
         """
         try:
-            wsrequest = session.soapclient.suspend_account(self.dn, None, justification)
+            wsrequest = yield Call(
+                session.soapclient.suspend_account, self.dn, None, justification
+            )
             return Response(session, wsrequest)
         except AttributeError:
             raise Exception(
                 "Account has no reference to ISIM, search for it to link it"
             )
 
+    @operation(runner=1)
     def restore(
         self, session: "Session", password: str, justification: str
     ) -> Response:
@@ -167,8 +173,12 @@ class Account:
             Response: ISIM SOAP API Response
         """
         try:
-            wsrequest = session.soapclient.restore_account(
-                self.dn, password, None, justification
+            wsrequest = yield Call(
+                session.soapclient.restore_account,
+                self.dn,
+                password,
+                None,
+                justification,
             )
             return Response(session, wsrequest)
         except AttributeError:
@@ -176,6 +186,7 @@ class Account:
                 "Account has no reference to ISIM, search for it to link it"
             )
 
+    @operation(runner=1)
     def orphan(self, session: "Session") -> None:
         """
         Request to orphan the specified account
@@ -187,13 +198,14 @@ class Account:
             None
         """
         try:
-            session.soapclient.orphan_single_account(self.dn)
+            yield Call(session.soapclient.orphan_single_account, self.dn)
             return
         except AttributeError:
             raise Exception(
                 "Account has no reference to ISIM, search for it to link it"
             )
 
+    @operation(runner=1)
     def delete(self, session: "Session", justification: str) -> Response:
         """
         Request to deprovision the specified account
@@ -206,8 +218,8 @@ class Account:
             Response: ISIM SOAP API Response
         """
         try:
-            wsrequest = session.soapclient.deprovision_account(
-                self.dn, None, justification
+            wsrequest = yield Call(
+                session.soapclient.deprovision_account, self.dn, None, justification
             )
             return Response(session, wsrequest)
         except AttributeError:
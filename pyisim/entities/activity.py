@@ -1,28 +1,45 @@
 from typing import TYPE_CHECKING, Dict, List, Union
 
 from ..exceptions import NotFoundError
-from ..response import Response
+from ..response import Response, _response_steps
+from ..steps import Call, Parallel, operation, run
 
 if TYPE_CHECKING:
     from ..auth import Session
 
 
 class Activity:
-    def __init__(self, session: "Session", activity=None, id: str = None):
+    def __init__(
+        self, session: "Session", activity=None, id: str = None, ws_activity=None
+    ):
         """
         Represents an ISIM Activity. Can do lookup using the id attribute.
 
         Args:
             session (Session): Active ISIM Session
-            activity (zeep.WSActivity, optional): Activity object returned from ISIM REST API. Defaults to None.
+            activity (dict, optional): Activity object returned from ISIM REST API. Defaults to None.
             id (str, optional): Activity ID for lookup. Defaults to None.
+            ws_activity (WSActivity, optional): SOAP Activity object (ex. from request process searches). The workitem, requestee and type are looked up on first access. Defaults to None.
         """
 
+        if ws_activity is not None:
+            self.href = f"/itim/rest/activities/{ws_activity['id']}"
+            self.request_href = f"/itim/rest/requests/{ws_activity['requestId']}"
+            self.name = ws_activity["name"]
+            if ws_activity["state"] == "R":
+                self.status = "PENDING"
+            # el resto se carga del API REST al usarlo
+            self._session = session
+            return
+
         if id:
             activity = session.restclient.lookup_activity(str(id))
             if "_attributes" not in activity.keys():
                 raise NotFoundError(f"Activity not found: {id}")
 
+        self.__fill(activity)
+
+    def __fill(self, activity: dict):
         self.request_href = activity["_links"]["request"]["href"]
         self.href = activity["_links"]["self"]["href"]
         self.workitem_href = activity["_links"]["workitem"]["href"]
@@ -31,6 +48,62 @@ class Activity:
         self.status = activity["_attributes"]["status"]["key"].split(".")[-1]
         self.requestee = activity["_links"]["requestee"]["title"]
 
+    def __getattr__(self, attr):
+        # solo se llama para atributos que no existen en la instancia
+        session = self.__dict__.get("_session")
+        if session is None or attr.startswith("_"):
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{attr}'"
+            )
+
+        try:
+            self.__load(session)
+        except NotFoundError as e:
+            # hasattr() y getattr(a, x, default) esperan AttributeError
+            raise AttributeError(str(e)) from e
+
+        return getattr(self, attr)
+
+    def __load(self, session: "Session"):
+        batch = [
+            a for a in self.__dict__.get("_batch", [self]) if "_session" in a.__dict__
+        ]
+        run(Activity._load_batch(session, batch, required=[self]))
+
+    @staticmethod
+    def _load_batch(
+        session: "Session", batch: List["Activity"], required: List["Activity"]
+    ):
+        # pasos para cargar los datos REST de un lote de actividades SOAP. Las requeridas que no
+        # aparezcan en la búsqueda se consultan por separado, el resto al usarlas
+        found = {}
+        if len(batch) > 1:
+            # una sola búsqueda de actividades pendientes para todo el lote, en vez de una consulta por actividad
+            for activity in (yield Call(session.restclient.search_activity)):
+                found[activity["_links"]["self"]["href"].split("/")[-1]] = activity
+
+        missing = [
+            a.href.split("/")[-1]
+            for a in required
+            if a.href.split("/")[-1] not in found
+        ]
+        looked_up = yield Parallel(
+            [Call(session.restclient.lookup_activity, i) for i in missing]
+        )
+        for activity_id, activity in zip(missing, looked_up):
+            if "_attributes" not in activity.keys():
+                raise NotFoundError(f"Activity not found: {activity_id}")
+            found[activity_id] = activity
+
+        for a in batch:
+            # el lote se busca una sola vez
+            a.__dict__.pop("_batch", None)
+            activity = found.get(a.href.split("/")[-1])
+            if activity is not None:
+                a.__fill(activity)
+                a.__dict__.pop("_session", None)
+
+    @operation(runner=1)
     def complete(
         self,
         session: "Session",
@@ -66,6 +139,28 @@ class Activity:
         act_dict["_links"]["workitem"]["href"] = self.workitem_href
 
         assert self.status == "PENDING", "Activity is already complete."
-        r = session.restclient.complete_activities([act_dict], result, justification)
+        r = yield Call(
+            session.restclient.complete_activities, [act_dict], result, justification
+        )
+
+        return (yield from _response_steps(session, r))
+
+
+def activities_from_ws(session: "Session", ws_activities) -> List[Activity]:
+    """
+    Builds activities from SOAP WSActivity objects, without a REST lookup each.
+
+    Their REST-only attributes (workitem, requestee, type) are loaded for the whole list at once,
+    with a single pending activity search, the first time any of them is used.
+
+    Args:
+        session (Session): Active ISIM Session
+        ws_activities (list): SOAP activities (ex. from soapclient.get_request_activities)
 
-        return Response(session, r)
+    Returns:
+        List[Activity]: Activities
+    """
+    activities = [Activity(session, ws_activity=a) for a in ws_activities]
+    for a in activities:
+        a._batch = activities
+    return activities
@@ -1,4 +1,7 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
+
+from ..cache import CONTAINER_CATEGORIES
+from ..steps import Call, Parallel, run
 
 if TYPE_CHECKING:
     from pyisim.auth import Session
@@ -17,38 +20,67 @@ class OrganizationalContainer:
             organizational_container (dict, optional): Used for initialization after search operations. Defaults to None.
         """
         if dn:
-            self.wsou = session.soapclient.lookup_container(dn)
+            _, self.wsou, self.href = run(_load_container(session, dn=dn))
             self.name = self.wsou.name
             self.dn = self.wsou["itimDN"]
             self.profile_name = self.wsou["profileName"]
 
-            rest_profile_names = {
-                "BusinessPartnerOrganization": "bporganizations",
-                "OrganizationalUnit": "organizationunits",
-                "Organization": "organizations",
-                "Location": "locations",
-                "AdminDomain": "admindomains",
-            }
-            self.href = session.restclient.search_containers(
-                rest_profile_names[self.profile_name], self.name
-            )[0]["_links"]["self"]["href"]
-
         elif organizational_container:
 
             self.name = organizational_container["_links"]["self"]["title"]
             self.href = organizational_container["_links"]["self"]["href"]
 
-            self.dn = organizational_container.get("_attributes", {}).get("dn")
-            if not self.dn:
-                cat = self.href.split("/")[-2]
-                id = self.href.split("/")[-1]
-                ou = session.restclient.lookup_organizational_container(cat, id)
-                self.dn = ou["_attributes"]["dn"]
-
-            self.wsou = session.soapclient.lookup_container(self.dn)
+            self.dn, self.wsou, _ = run(
+                _load_container(
+                    session,
+                    dn=organizational_container.get("_attributes", {}).get("dn"),
+                    href=self.href,
+                )
+            )
             self.profile_name = self.wsou["profileName"]
 
     def __eq__(self, o: object) -> bool:
         if type(o) is type(self):
             return self.dn == o.dn
         return False
+
+
+def _load_container(session: "Session", dn: str = None, href: str = None):
+    # pasos para completar el DN, el WSOrganizationalContainer y el href de un contenedor (basta con uno
+    # de los dos primeros). Usa y completa el cache de contenedores de la sesión. Retorna (dn, wsou, href)
+    cache = getattr(session, "container_cache", None)
+
+    if not dn and cache:
+        dn = cache.dn_for(href)
+    if not dn:
+        category, id = href.split("/")[-2:]
+        ou = yield Call(
+            session.restclient.lookup_organizational_container, category, id
+        )
+        dn = ou["_attributes"]["dn"]
+
+    known = cache.get(dn) if cache else {}
+    wsou = known.get("wsou")
+    if wsou is None:
+        wsou = yield Call(session.soapclient.lookup_container, dn)
+
+    href = href or known.get("href")
+    if not href:
+        found = yield Call(
+            session.restclient.search_containers,
+            CONTAINER_CATEGORIES[wsou["profileName"]],
+            wsou["name"],
+        )
+        href = found[0]["_links"]["self"]["href"]
+
+    if cache:
+        cache.put(dn, wsou=wsou, href=href)
+    return dn, wsou, href
+
+
+def _load_containers(
+    session: "Session", refs: Iterable[Tuple[Optional[str], Optional[str]]]
+):
+    # pasos para cargar al cache varios contenedores a la vez, por pares (dn, href)
+    unique = {(dn or href).lower(): (dn, href) for dn, href in refs if dn or href}
+    yield Parallel([_load_container(session, dn, href) for dn, href in unique.values()])
@@ -1,10 +1,12 @@
 from typing import TYPE_CHECKING, Dict, List
 
+from ..cache import cached
 from ..exceptions import NotFoundError, PersonNotFoundError
-from ..response import Response
+from ..response import Response, _response_steps
+from ..steps import Call, is_async, operation, run
 from .account import Account
-from .organizational_container import OrganizationalContainer
-from .role import DynamicRole, StaticRole
+from .organizational_container import OrganizationalContainer, _load_containers
+from .role import role_id, roles_by_id
 
 if TYPE_CHECKING:
     from pyisim.auth import Session
@@ -27,6 +29,8 @@ class Person:
         href: str = None,
         dn: str = None,
         person_attrs: dict = None,
+        ws_person=None,
+        lazy: bool = False,
     ):
         """
         Args:
@@ -35,23 +39,23 @@ class Person:
             href (str, optional): Used for initialization for lookup operations. Defaults to None.
             dn (str,optional): Used for DN Lookup operations. Defaults to None.
             person_attrs: Dictionary of person attributes
+            ws_person (WSPerson, optional): SOAP Person object returned from SOAP searches. The REST href is looked up on first use. Defaults to None.
+            lazy (bool, optional): Load the attributes missing from the initialization data on first access (all of them, in a single request). Attributes set before that count as changes. Defaults to False.
         """
 
         self.changes = {}
         self.embedded = {}
 
         if dn:
-            r=session.restclient.lookup_person_dn(dn)
-            if isinstance(r,dict) and "SEARCH_FAILURE" in r.get("key",""):
-                raise NotFoundError(f"Person is invalid or not found: {dn}")
+            r = run(_lookup_dn(session, dn))
 
-            self.href=r[0]["_links"]["self"]["href"]
-            self.dn=dn
-            person_attrs = r[0]["_attributes"]
+            self.href = r["_links"]["self"]["href"]
+            self.dn = dn
+            person_attrs = r["_attributes"]
 
         elif person:
+            # el DN viene en los atributos si se pidió, si no se busca al necesitarlo
             self.href = person["_links"]["self"]["href"]
-            self.__get_dn(session)
             person_attrs = person["_attributes"]
 
             embedded = person.get("_embedded")
@@ -64,14 +68,71 @@ class Person:
                 raise NotFoundError(f"Person is invalid or not found: {href}")
 
             self.href = href
-            self.__get_dn(session)
             person_attrs = r["_attributes"]
 
+        elif ws_person:
+            self.dn = ws_person["itimDN"]
+            person_attrs = {}
+            for a in ws_person["attributes"]["item"]:
+                attr_values = a["values"]["item"]
+                person_attrs[a["name"]] = (
+                    attr_values if len(attr_values) > 1 else attr_values[0]
+                )
+
         for k, v in person_attrs.items():
             setattr(self, k, v)
 
+        # solo las perezosas guardan la sesión, para cargar sus atributos al usarlos
+        if lazy:
+            super().__setattr__("_session", session)
+            super().__setattr__("_lazy", True)
+
+    def __getstate__(self):
+        # la sesión (locks, conexiones) no se copia ni se serializa: la copia queda como una persona parcial
+        state = dict(self.__dict__)
+        state.pop("_session", None)
+        state.pop("_lazy", None)
+        return state
+
+    def __getattr__(self, attr):
+        # solo se llama para atributos que no existen en la instancia
+        session = self.__dict__.get("_session")
+        if session is None or attr.startswith("_"):
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{attr}'"
+            )
+
+        if attr == "dn" and "href" in self.__dict__:
+            run(self.__get_dn(session))
+            return self.__dict__["dn"]
+
+        if not self.__dict__.get("_lazy"):
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{attr}'"
+            )
+
+        self.__load_attributes(session)
+        return getattr(self, attr)
+
+    def __load_attributes(self, session: "Session"):
+        run(self.__get_href(session))
+        if "href" not in self.__dict__:
+            raise PersonNotFoundError(
+                "Person has no reference to ISIM, search for it to link it."
+            )
+
+        r = session.restclient.lookup_person(self.href, attributes="*")
+        for k, v in r.get("_attributes", {}).items():
+            # los valores modificados localmente se conservan
+            self.__dict__.setdefault(k, v)
+
+        # una sola vez: sin _lazy, __getattr__ ya no vuelve a cargar. Si la consulta falla, se reintenta
+        del self.__dict__["_lazy"]
+
     def __setattr__(self, attr, val):
-        if hasattr(self, attr) and attr not in ("changes", "embedded", "href", "dn"):
+        # __dict__ y no hasattr(): no debe disparar la carga de los atributos
+        known = attr in self.__dict__ or self.__dict__.get("_lazy")
+        if known and attr not in ("changes", "embedded", "href", "dn"):
             self.changes[attr] = val
         super().__setattr__(attr, val)
 
@@ -86,6 +147,7 @@ class Person:
 
         return super().__init_subclass__()
 
+    @operation(runner=1)
     def add(
         self, session: "Session", parent: "OrganizationalContainer", justification: str
     ) -> Response:
@@ -102,29 +164,64 @@ class Person:
         """
         orgid = parent.href.split("/")[-1]
 
-        person_data = self.__dict__.copy()
-        person_data.pop("changes", "")
-        person_data.pop("embedded", "")
-
-        ret = session.restclient.add_person(
-            person_data, self.profile_name, orgid, justification
+        person_data = {
+            k: v
+            for k, v in self.__dict__.items()
+            if k not in ("changes", "embedded") and not k.startswith("_")
+        }
+
+        ret = yield Call(
+            session.restclient.add_person,
+            person_data,
+            self.profile_name,
+            orgid,
+            justification,
         )
-        return Response(session, ret)
+        return (yield from _response_steps(session, ret))
+
+    @operation(runner=1)
+    def get_dn(self, session: "Session") -> str:
+        """
+        Returns the person's DN, looking it up if it was not in the initialization data.
+
+        Args:
+            session (Session): Active ISIM Session
+
+        Raises:
+            PersonNotFoundError: The person has no reference to ISIM (href or DN)
+
+        Returns:
+            str: Person DN
+        """
+        yield from self.__get_href(session)
+        yield from self.__get_dn(session)
+        return self.dn
 
     def __get_dn(self, session: "Session"):
-        try:
-            href = self.href
-            if not hasattr(self, "dn"):
-                person = session.restclient.lookup_person(href, attributes="dn")
-                dn = person.get("_attributes", {}).get("dn")
-                if dn is None or person["_links"]["self"]["href"] != href:
-                    raise AttributeError
-                self.dn = person["_attributes"]["dn"]
-        except AttributeError:
+        # pasos para buscar el DN por el href, si falta
+        if "dn" in self.__dict__:
+            return
+        href = self.__dict__.get("href")
+        if href is None:
+            raise PersonNotFoundError(
+                "Person has no reference to ISIM, search for it to link it."
+            )
+
+        person = yield Call(session.restclient.lookup_person, href, attributes="dn")
+        dn = person.get("_attributes", {}).get("dn")
+        if dn is None or person["_links"]["self"]["href"] != href:
             raise PersonNotFoundError(
                 "Person has no reference to ISIM, search for it to link it."
             )
+        self.dn = dn
+
+    def __get_href(self, session: "Session"):
+        # pasos para buscar el href por el DN, si falta
+        if "href" not in self.__dict__ and "dn" in self.__dict__:
+            r = yield from _lookup_dn(session, self.dn, attributes="dn")
+            self.href = r["_links"]["self"]["href"]
 
+    @operation(runner=1)
     def modify(self, session: "Session", justification: str, changes={}) -> Response:
         """
         Requests to modify the person in ISIM.
@@ -140,12 +237,16 @@ class Person:
             Response: ISIM API Response
         """
 
-        self.__get_dn(session)
+        yield from self.__get_href(session)
+        yield from self.__get_dn(session)
         self.changes.update(changes)
 
-        ret = session.restclient.modify_person(self.href, self.changes, justification)
-        return Response(session, ret)
+        ret = yield Call(
+            session.restclient.modify_person, self.href, self.changes, justification
+        )
+        return (yield from _response_steps(session, ret))
 
+    @operation(runner=1)
     def request_access(
         self, session: "Session", accesses: List["Access"], justification: str
     ) -> Response:
@@ -162,11 +263,14 @@ class Person:
         """
 
         ret = {}
-        self.__get_dn(session)
+        yield from self.__get_href(session)
+        yield from self.__get_dn(session)
 
         if len(accesses) > 0:
-            ret = session.restclient.request_access(accesses, self, justification)
-            return Response(session, ret)
+            ret = yield Call(
+                session.restclient.request_access, accesses, self, justification
+            )
+            return (yield from _response_steps(session, ret))
         else:
             return Response(
                 session,
@@ -174,6 +278,7 @@ class Person:
                 content={"message": "List is empty, no access requested."},
             )
 
+    @operation(runner=1)
     def suspend(
         self, session: "Session", justification: str, suspend_accounts: bool = False
     ) -> Response:
@@ -188,13 +293,18 @@ class Person:
             Response: ISIM API Response
         """
 
-        self.__get_dn(session)
+        yield from self.__get_dn(session)
 
-        ret = session.soapclient.suspend_person_advanced(
-            self.dn, suspend_accounts, None, justification
+        ret = yield Call(
+            session.soapclient.suspend_person_advanced,
+            self.dn,
+            suspend_accounts,
+            None,
+            justification,
         )
         return Response(session, ret)
 
+    @operation(runner=1)
     def restore(
         self,
         session: "Session",
@@ -215,13 +325,19 @@ class Person:
             Response: ISIM API Response
         """
 
-        self.__get_dn(session)
+        yield from self.__get_dn(session)
 
-        ret = session.soapclient.restore_person(
-            self.dn, restore_accounts, password, None, justification
+        ret = yield Call(
+            session.soapclient.restore_person,
+            self.dn,
+            restore_accounts,
+            password,
+            None,
+            justification,
         )
         return Response(session, ret)
 
+    @operation(runner=1)
     def delete(self, session: "Session", justification: str) -> Response:
         """
         Requests to delete the person in ISIM
@@ -234,11 +350,12 @@ class Person:
             Response: ISIM API Response
         """
 
-        self.__get_dn(session)
+        yield from self.__get_dn(session)
 
-        ret = session.soapclient.delete_person(self.dn, justification)
+        ret = yield Call(session.soapclient.delete_person, self.dn, justification)
         return Response(session, ret)
 
+    @operation(runner=1)
     def get_accounts(self, session: "Session") -> List[Account]:
         """
         Retrieves all registered accounts of the referenced person.
@@ -250,23 +367,38 @@ class Person:
             List[Account]: List of the person account entities.
         """
 
-        self.__get_dn(session)
+        yield from self.__get_dn(session)
 
-        result = session.soapclient.get_accounts_by_owner(self.dn)
+        result = yield Call(session.soapclient.get_accounts_by_owner, self.dn)
         return [Account(session, account=r) for r in result]
 
     def __fill_embedded(self, session: "Session", embedded: dict) -> None:
 
         for attr, value in embedded.items():
-            href = value["_links"]["self"]["href"].lower()
-            if "people" in href:
-                self.embedded[attr] = [Person(session, person=value)]
-            elif "organizationcontainers" in href:
-                ou = [OrganizationalContainer(session, organizational_container=value)]
-                self.embedded[attr] = ou
-
+            href = value["_links"]["self"]["href"]
+            if "people" in href.lower():
+                person = cached(
+                    session, "Person", href, lambda: Person(session, person=value)
+                )
+                self.embedded[attr] = [person]
+            elif "organizationcontainers" in href.lower():
+                ou = cached(
+                    session,
+                    "OrganizationalContainer",
+                    href,
+                    lambda: OrganizationalContainer(
+                        session, organizational_container=value
+                    ),
+                )
+                self.embedded[attr] = [ou]
+
+    @operation(runner=1)
     def get_embedded(
-        self, session: "Session", embedded: List[str] = None, roles=False
+        self,
+        session: "Session",
+        embedded: List[str] = None,
+        roles=False,
+        roles_by_id: Dict = None,
     ) -> Dict[str, List]:
         """
         Gets or updates the specified embedded attributes as PyISIM entities.
@@ -275,41 +407,63 @@ class Person:
         Args:
             embedded (List[str], optional): List of attributes to embed as PyISIM entities
             roles (bool, optional): Specifies to embed the person's roles
+            roles_by_id (Dict, optional): Roles already resolved, by erglobalid (shared between people, see pyisim.entities.role.roles_by_id). Defaults to None (resolved in batched searches).
 
         Returns:
             Dict[str, List]: Dictionary of embedded entities.
         """
 
-        self.__get_dn(session)
+        yield from self.__get_href(session)
+        yield from self.__get_dn(session)
 
         if embedded:
             embeds = ",".join(embedded)
-            p = session.restclient.lookup_person(self.href, embedded=embeds)
+            p = yield Call(session.restclient.lookup_person, self.href, embedded=embeds)
 
             values = p.get("_embedded")
             if values:
+                if is_async(session):
+                    yield from _load_embedded_containers(session, [p])
                 self.__fill_embedded(session, values)
 
         if roles:
-            self.__get_roles(session)
+            yield from self.__get_roles(session, roles_by_id)
 
         return self.embedded
 
-    def __get_roles(self, session: "Session") -> None:
-
+    def __get_roles(self, session: "Session", roles: Dict = None) -> None:
         if not hasattr(self, "erroles"):
             raise KeyError("Person has no roles or was initialized without them.")
 
-        roles = []
-        for role_dn in self.erroles:
-            r = session.soapclient.lookup_role(role_dn)
-            attrs = {
-                attr["name"]: [i for i in attr["values"]["item"]]
-                for attr in r["attributes"]["item"]
-            }
-            if "erDynamicRole" in attrs["objectclass"]:
-                roles.append(DynamicRole(session, dn=role_dn))
-            else:
-                roles.append(StaticRole(session, dn=role_dn))
-
-        self.embedded["roles"] = roles
+        role_dns = [self.erroles] if isinstance(self.erroles, str) else self.erroles
+        if roles is None:
+            roles = yield Call(roles_by_id, session, role_dns)
+
+        embedded = []
+        for role_dn in role_dns:
+            if role_id(role_dn) not in roles:
+                raise NotFoundError(f"Role not found: {role_dn}")
+            embedded.append(roles[role_id(role_dn)])
+
+        self.embedded["roles"] = embedded
+
+
+def _lookup_dn(session: "Session", dn: str, attributes="*"):
+    # pasos de la consulta de una persona por DN. Retorna el resultado REST
+    r = yield Call(session.restclient.lookup_person_dn, dn, attributes=attributes)
+    if isinstance(r, dict) and "SEARCH_FAILURE" in r.get("key", ""):
+        raise NotFoundError(f"Person is invalid or not found: {dn}")
+    return r[0]
+
+
+def _load_embedded_containers(session: "Session", people: List[dict]):
+    # pasos para cargar al cache los contenedores embebidos en resultados REST de personas,
+    # así las personas se construyen sin consultarlos
+    refs = []
+    for p in people:
+        for value in p.get("_embedded", {}).values():
+            href = value["_links"]["self"]["href"]
+            if "organizationcontainers" in href.lower():
+                refs.append((value.get("_attributes", {}).get("dn"), href))
+
+    yield from _load_containers(session, refs)
@@ -3,6 +3,7 @@ import datetime
 from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Union
 
 from .organizational_container import OrganizationalContainer
+from ..cache import cached
 from ..response import Response
 
 if TYPE_CHECKING:
@@ -126,6 +127,13 @@ class ProvisioningPolicyAttributes:
 
 
 class ProvisioningPolicy:
+    ou_dn: str = None
+    """
+    Provisioning Policy Business Unit DN
+    """
+    __ou = None
+    __session = None
+
     def __init__(
         self,
         session: "Session",
@@ -182,9 +190,9 @@ class ProvisioningPolicy:
             self.description = provisioning_policy["description"]
             self.name = provisioning_policy["name"]
             self.dn = provisioning_policy["itimDN"]
-            self.ou = OrganizationalContainer(
-                session, dn=provisioning_policy["organizationalContainer"]["itimDN"]
-            )
+            # el contenedor se consulta solo si se usa self.ou
+            self.ou_dn = provisioning_policy["organizationalContainer"]["itimDN"]
+            self.__session = session
             self.priority = provisioning_policy["priority"]
             self.scope = provisioning_policy["scope"]
 
@@ -204,6 +212,26 @@ class ProvisioningPolicy:
             self.keywords = provisioning_policy["keywords"]
             self.enabled = provisioning_policy["enabled"]
 
+    @property
+    def ou(self) -> OrganizationalContainer:
+        """
+        Provisioning Policy Business Unit. Looked up on first access.
+        """
+        if self.__ou is None and self.ou_dn and self.__session:
+            session, dn = self.__session, self.ou_dn
+            self.__ou = cached(
+                session,
+                "OrganizationalContainer",
+                dn,
+                lambda: OrganizationalContainer(session, dn=dn),
+            )
+        return self.__ou
+
+    @ou.setter
+    def ou(self, value: OrganizationalContainer) -> None:
+        self.__ou = value
+        self.ou_dn = value.dn if value else None
+
     def __traducirWSEntitlements(self, session, wsentitlements):
         """
         Convierte WSEntitlements en diccionario estándar para poder modificar
@@ -334,7 +362,7 @@ class ProvisioningPolicy:
 
             type_ = 1 if attrs["automatic"] else 0
             process_dn = (
-                session.searchWorkflow(attrs["workflow"], self.ou.name)
+                session.search_workflow(attrs["workflow"], self.ou.name)
                 if attrs["workflow"]
                 else None
             )
@@ -1,6 +1,6 @@
 from typing import List, TYPE_CHECKING
 from ..exceptions import NotFoundError
-
+from ..steps import Call, operation, run
 
 if TYPE_CHECKING:
     from .activity import Activity
@@ -21,10 +21,7 @@ class Request:
         """
 
         if id:
-            try:
-                request = session.soapclient.get_request(id)
-            except Exception as e:
-                raise NotFoundError(f"Request {id} not found.")
+            request = run(_lookup_request(session, id))
         elif not request:
             raise NotFoundError(f"Request not specified.")
 
@@ -49,21 +46,33 @@ class Request:
         self.process_state = request["processState"]
         self.time_scheduled = request["timeScheduled"]
 
-    def get_pending_activities(self, session: "Session") -> List["Activity"]:
+    @operation(runner=1)
+    def get_pending_activities(
+        self, session: "Session", max_depth: int = None
+    ) -> List["Activity"]:
         """
         Gets the request pending activities
 
         Args:
             session(Session): Active ISIM session
+            max_depth (int, optional): Levels of child processes to walk (0: only this request's process). Defaults to None (whole tree).
 
         Returns:
             List[Activity]: List of pending activities.
         """
-        from .activity import Activity
-
-        results = session.soapclient.get_request_activities(self.id)
-        return [Activity(session, id=a.id) for a in results]
-
+        from pyisim import search
+
+        return (
+            yield Call(
+                search.activities,
+                session,
+                by="requestId",
+                search_filter=self.id,
+                max_depth=max_depth,
+            )
+        )
+
+    @operation(runner=1)
     def abort(self, session: "Session", justification: str) -> None:
         """
         Aborts the request
@@ -73,7 +82,7 @@ class Request:
             justification (str): Justification for the abortion
         """
 
-        session.soapclient.abort_request(self.id, justification)
+        yield Call(session.soapclient.abort_request, self.id, justification)
         return
 
     # Maybe implement this later on
@@ -81,3 +90,11 @@ class Request:
     #     self,
     # ):
     #     pass
+
+
+def _lookup_request(session: "Session", id: str):
+    # pasos de la consulta de una solicitud por id. Retorna el WSRequest
+    try:
+        return (yield Call(session.soapclient.get_request, id))
+    except Exception:
+        raise NotFoundError(f"Request {id} not found.")
@@ -1,8 +1,11 @@
 from collections import defaultdict
+from ..cache import cached
 from ..response import Response
-from .organizational_container import OrganizationalContainer
+from ..steps import Call, Parallel, is_async, operation
+from .organizational_container import OrganizationalContainer, _load_containers
+from ..utils import escape_filter_value
 import dataclasses
-from typing import Dict, List, Literal, TYPE_CHECKING, Union
+from typing import Dict, Iterable, List, Literal, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     from pyisim.auth import Session
@@ -71,6 +74,12 @@ class RoleAttributes:
 
 class Role:
     type = None
+    parent_dn: str = None
+    """
+    Role Business Unit DN
+    """
+    __parent = None
+    __session = None
 
     def __init__(
         self,
@@ -152,8 +161,9 @@ class Role:
                     self.type = "static"
 
             attrs = defaultdict(list, attrs)
-            ou = attrs["erparent"][0]  # dn del contenedor
-            self.parent = OrganizationalContainer(session, dn=ou)
+            # el contenedor se consulta solo si se usa self.parent
+            self.parent_dn = attrs["erparent"][0]
+            self.__session = session
             if attrs["erroleclassification"]:
                 self.classification = attrs["erroleclassification"][0]
             if attrs["eraccessoption"]:
@@ -169,6 +179,26 @@ class Role:
 
             self.owners = attrs["owner"]
 
+    @property
+    def parent(self) -> OrganizationalContainer:
+        """
+        Role Business Unit. Looked up on first access.
+        """
+        if self.__parent is None and self.parent_dn and self.__session:
+            session, dn = self.__session, self.parent_dn
+            self.__parent = cached(
+                session,
+                "OrganizationalContainer",
+                dn,
+                lambda: OrganizationalContainer(session, dn=dn),
+            )
+        return self.__parent
+
+    @parent.setter
+    def parent(self, value: OrganizationalContainer) -> None:
+        self.__parent = value
+        self.parent_dn = value.dn if value else None
+
     def __crearAtributoRol(self, client, name, values):
         itemFactory = client.type_factory("ns1")
         listFactory = client.type_factory("ns0")
@@ -182,7 +212,6 @@ class Role:
         return attr
 
     def __crearWSRole(self, session):
-
         """
         A partir de la información de la instancia, devuelve un objeto WSRole para entregárselo al API de ISIM
         """
@@ -371,3 +400,73 @@ class StaticRole(Role):
             raise ValueError("Static roles can't have a scope defined")
 
         super().__init__(session, dn, rol, role_attrs)
+
+
+def role_id(dn: str) -> str:
+    """
+    Returns the erglobalid of a role DN (erglobalid=123,ou=roles,...).
+    """
+    return dn.split(",")[0].split("=", 1)[1].strip()
+
+
+def role_from_ws(session: "Session", rol) -> Role:
+    """
+    Builds a StaticRole or DynamicRole from a SOAP WSRole.
+    """
+    is_dynamic = any(filter(lambda i: i.name == "erjavascript", rol.attributes.item))
+    return DynamicRole(session, rol=rol) if is_dynamic else StaticRole(session, rol=rol)
+
+
+@operation
+def roles_by_id(
+    session: "Session", role_dns: Iterable[str], chunk_size=100, max_workers=8
+) -> Dict[str, Role]:
+    """
+    Resolves role DNs with (|(erglobalid=...)...) searches per chunk instead of one lookup per role.
+
+    The roles are keyed by erglobalid, which does not change with the DN formatting
+    (spacing, case) of the references. Uses the session identity map, if any.
+
+    Args:
+        session (Session): Active ISIM Session
+        role_dns (Iterable[str]): Role DNs. Example: a person's erroles.
+        chunk_size (int, optional): Roles per search filter. Defaults to 100.
+        max_workers (int, optional): Chunks searched at the same time. Defaults to 8.
+
+    Returns:
+        Dict[str, Role]: erglobalid -> StaticRole or DynamicRole. Roles not found are left out.
+    """
+    identity_map = getattr(session, "identity_map", None)
+
+    roles = {}
+    missing = []
+    for dn in role_dns:
+        role = identity_map.get("Role", dn) if identity_map else None
+        if role:
+            roles[role_id(dn)] = role
+        else:
+            missing.append(role_id(dn))
+
+    ids = list(dict.fromkeys(i for i in missing if i not in roles))
+    chunks = [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+    def search_chunk(chunk):
+        terms = "".join(f"(erglobalid={escape_filter_value(i)})" for i in chunk)
+        return Call(session.soapclient.search_role, f"(|{terms})", find_unique=False)
+
+    found = []
+    for results in (
+        yield Parallel([search_chunk(c) for c in chunks], max_workers=max_workers)
+    ):
+        for r in results:
+            role = role_from_ws(session, r)
+            roles[role_id(r["itimDN"])] = role
+            found.append(role)
+            if identity_map:
+                identity_map.put("Role", r["itimDN"], role)
+
+    if is_async(session):
+        # en asyncio role.parent no puede consultar el contenedor al usarlo: se carga antes
+        yield from _load_containers(session, [(r.parent_dn, None) for r in found])
+
+    return roles
@@ -20,3 +20,7 @@ class ContratoNoEncontradoError(Exception):
 
 class InvalidOptionError(Exception):
     pass
+
+
+class SizeLimitExceededError(Exception):
+    pass
@@ -0,0 +1,148 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+import requests
+from zeep.exceptions import TransportError
+
+
+class _Slot:
+    failed = False
+
+
+def overload_error(e: BaseException) -> bool:
+    """
+    True if the error is a sign of an overloaded server: connection errors, timeouts and HTTP 5xx.
+    SOAP faults are business errors (ex. an invalid DN) and are not.
+    """
+    if isinstance(
+        e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    ):
+        return True
+    if isinstance(e, TransportError):
+        return e.status_code >= 500
+    return isinstance(e, (ConnectionError, TimeoutError))
+
+
+class ConcurrencyLimiter:
+    """
+    Adaptive (AIMD) limit on the number of ISIM calls in flight.
+
+    The limit grows by one every time a full window of calls completes with latency close to
+    the best latency seen, and is cut by the backoff factor when latency rises past the
+    tolerance or a call fails with an overload error (HTTP 5xx, connection error, timeout).
+    It is cut at most once per round trip: calls that were already in flight at the last cut
+    do not cut it again. Calls over the limit wait in a queue.
+
+    Share one instance between the REST and SOAP clients with Session(..., limiter=...).
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        tolerance: float = 2.0,
+    ):
+        """
+        Args:
+            initial_limit (int, optional): Calls allowed in flight at start. Defaults to 4.
+            min_limit (int, optional): Lowest limit. Defaults to 1.
+            max_limit (int, optional): Highest limit. Defaults to 64.
+            backoff (float, optional): Factor applied to the limit on failures or rising latency. Defaults to 0.5.
+            tolerance (float, optional): Latency, as a multiple of the best latency seen, considered "rising". Defaults to 2.0.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+
+        self.__limit = float(initial_limit)
+        self.__in_flight = 0
+        self.__queued = 0
+        self.__baseline = None
+        self.__last_decrease = float("-inf")
+        self.__cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """
+        Current number of calls allowed in flight.
+        """
+        return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Calls currently running.
+        """
+        return self.__in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Calls waiting for a free slot.
+        """
+        return self.__queued
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: limit, in_flight, queue_depth and baseline latency (seconds).
+        """
+        with self.__cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.__in_flight,
+                "queue_depth": self.__queued,
+                "baseline_latency": self.__baseline,
+            }
+
+    @contextmanager
+    def slot(self) -> Iterator[_Slot]:
+        """
+        Waits for a free slot and holds it during the call.
+
+        Overload errors raised inside the block (see overload_error) count as failures. Failures that
+        do not raise (ex. HTTP 5xx responses) can be reported by setting ``failed = True`` on the yielded slot.
+        """
+        with self.__cond:
+            self.__queued += 1
+            while self.__in_flight >= self.limit:
+                self.__cond.wait()
+            self.__queued -= 1
+            self.__in_flight += 1
+
+        slot = _Slot()
+        start = time.monotonic()
+        try:
+            yield slot
+        except BaseException as e:
+            slot.failed = slot.failed or overload_error(e)
+            raise
+        finally:
+            self.__release(start, time.monotonic() - start, slot.failed)
+
+    def __release(self, start: float, latency: float, failed: bool) -> None:
+        with self.__cond:
+            self.__in_flight -= 1
+
+            # las fallas rápidas (conexión rechazada, 503 inmediato) no miden la latencia del servidor
+            if not failed:
+                if self.__baseline is None:
+                    self.__baseline = latency
+                else:
+                    # el mínimo sube lentamente para adaptarse si la latencia base cambia
+                    self.__baseline = min(latency, self.__baseline * 1.01)
+
+            if failed or latency > self.__baseline * self.tolerance:
+                # las llamadas en vuelo durante la última reducción ya la provocaron: una sola por ventana
+                if start >= self.__last_decrease:
+                    self.__limit = max(self.min_limit, self.__limit * self.backoff)
+                    self.__last_decrease = time.monotonic()
+            else:
+                self.__limit = min(self.max_limit, self.__limit + 1 / self.__limit)
+
+            self.__cond.notify_all()
@@ -1,4 +1,4 @@
-from .entities.request import Request
+from .entities.request import Request, _lookup_request
 from typing import TYPE_CHECKING
 from zeep.helpers import serialize_object
 
@@ -7,7 +7,9 @@ if TYPE_CHECKING:
 
 
 class Response:
-    def __init__(self, session: "Session", raw, content=None) -> None:
+    def __init__(
+        self, session: "Session", raw, content=None, request: Request = None
+    ) -> None:
         """
         Represents a response from ISIM APIs. Not to be instantiated directly.
 
@@ -18,6 +20,7 @@ class Response:
             session (Session): Active ISIM Session
             raw (dict): SOAP Response (zeep.xsd.object), REST Response (requests.response) or None.
             content (Any, optional): Extra content generated by the API. Defaults to None.
+            request (Request, optional): Request of the response, if already looked up. Defaults to None (looked up from the REST response).
         """
 
         if raw is None:
@@ -30,21 +33,13 @@ class Response:
             self.raw = raw.json() if raw else {}
             self.type = "REST"
 
-        if self.raw:
+        if request is not None:
+            self.request = request
+        elif self.raw:
             if "WSRequest" in type(raw).__name__:
                 self.request = Request(session, request=raw)
             elif isinstance(self.raw, dict):
-                if self.raw.get("request_id"):
-                    request_id = self.raw["request_id"]
-                elif self.raw.get("requestID"):
-                    request_id = self.raw["requestID"]
-                elif self.raw.get("requestId"):
-                    request_id = self.raw["requestId"]
-                elif self.raw.get("_links", {}).get("result", {}).get("href"):
-                    request_id = self.raw["_links"]["result"]["href"]
-                else:
-                    request_id = None
-
+                request_id = get_request_id(self.raw)
                 if request_id:
                     self.request = Request(session, id=request_id)
 
@@ -58,3 +53,33 @@ class Response:
                 }
             else:
                 self.result = {"reason": "Accepted"}
+
+
+def get_request_id(raw: dict):
+    """
+    Returns the request ID of a REST API response, or None if it has none.
+    """
+    if raw.get("request_id"):
+        return raw["request_id"]
+    elif raw.get("requestID"):
+        return raw["requestID"]
+    elif raw.get("requestId"):
+        return raw["requestId"]
+    elif raw.get("_links", {}).get("result", {}).get("href"):
+        return raw["_links"]["result"]["href"]
+    return None
+
+
+def _response_steps(session: "Session", raw, content=None):
+    # pasos para construir la respuesta: la solicitud de una respuesta REST se busca como un paso más,
+    # para que Response no tenga que consultarla (de forma síncrona)
+    request = None
+    if raw is not None and "zeep" not in type(raw).__module__ and raw:
+        body = raw.json()
+        request_id = get_request_id(body) if isinstance(body, dict) else None
+        if request_id:
+            request = Request(
+                session, request=(yield from _lookup_request(session, request_id))
+            )
+
+    return Response(session, raw, content=content, request=request)
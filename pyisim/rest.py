@@ -1,8 +1,11 @@
 import json
+import threading
 import requests
 import urllib
 from urllib.parse import urlencode
 from pyisim.exceptions import NotFoundError, MultipleFoundError, AuthenticationError
+from pyisim.steps import Call, operation, run
+from pyisim.transport import ConnectionPool
 
 requests.packages.urllib3.disable_warnings()
 
@@ -13,48 +16,150 @@ requests.packages.urllib3.disable_warnings()
 # si viene con algún atrubuto, lo recupera
 
 
-class ISIMClient:
-    def __init__(self, url, user_, pass_, cert_path=None):
+def build_rfi_form(form_details, rfi_values):
+    """
+    Arma los valores del formulario de un RFI a partir de sus detalles (rfiformdetails).
+    """
+    # esto es un arreglo con la info del formulario
+    form = form_details["template"]["page"]["body"]["tabbedForm"]["tab"]
 
-        self.__addr = url
-        self.s, self.CSRF = self.login(user_, pass_, cert_path)
+    rfi_form = []
+    for tab in form:
+        for element in tab["formElement"]:
+            attr_name = element["name"].split(".")[-1]
+            editable = element["editable"]
+            value = ""
 
-    def login(self, user_, pass_, cert=None):
+            try:
+                required = element["required"]
+            except KeyError:
+                required = False
 
-        assert cert is not None, "No certificate passed"
-        url = self.__addr + "/itim/restlogin/login.jsp"
-        s = requests.Session()
-        # print(cert)
-        s.verify = cert
+            if required:
+                try:
+                    value = form_details["defaultAttrValues"][attr_name]
+                except KeyError:
+                    pass
+            if editable:
+                value = [
+                    attr["value"] for attr in rfi_values if attr["name"] == attr_name
+                ][0]
+
+            if editable or required:
+                rfi_form.append(
+                    {
+                        "name": attr_name,
+                        "value": value,
+                    }
+                )
+
+    return rfi_form
+
+
+RESULT_CODES = {
+    "approve": "AA",
+    "reject": "AR",
+    "successful": "SS",
+    "warning": "SW",
+    "failure": "SF",
+}
+
+
+def workitem_action(activity, resultado, justification):
+    """
+    Arma la acción para completar el workitem de una actividad. resultado va en minúsculas (o es la lista de valores de un RFI).
+    """
+    activityType = activity["_attributes"]["type"]
+    activityLabel = activity["_attributes"]["name"]
+    workitem = activity["_links"]["workitem"]["href"]
+
+    if activityType == "APPROVAL":
+        assert resultado in ["approve", "reject"]
+    elif activityType == "WORK_ORDER":
+        assert resultado in ["successful", "warning", "failure"]
+    elif activityType == "RFI":
+        assert isinstance(resultado, list)
+
+    resultCode = RESULT_CODES[resultado] if activityType != "RFI" else "RS"
+    return {
+        "_links": {"self": {"href": workitem}},
+        "action": {"code": resultCode},
+        "label": activityLabel,
+        "justification": justification,
+    }
+
+
+class BaseClient:
+    """
+    Operaciones del API REST de ISIM, comunes al cliente síncrono (ISIMClient) y al de asyncio (pyisim.aio).
+
+    Cada operación pide sus peticiones con Call(self.request, ...): las subclases solo implementan
+    la E/S (_send y _relogin) y el driver con que se ejecutan (ver pyisim.steps).
+    """
+
+    addr = None
+    CSRF = None
+    reauthenticate = True
+
+    def _login(self, send, user_, pass_):
+        # pasos del login; send hace las peticiones con la sesión HTTP que se autentica. Retorna el token CSRF
+        url = self.addr + "/itim/restlogin/login.jsp"
         headers = {"Accept": "*/*"}
-        r1 = s.get(url, headers=headers)
+        r1 = yield Call(send, "GET", url, headers=headers)
 
         assert 404 != r1.status_code, "Error 404: " + r1.text
         # jsessionid=self.s.cookies.get("JSESSIONID")
 
-        url = self.__addr + "/itim/j_security_check"
+        url = self.addr + "/itim/j_security_check"
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         # cookies={"j_username_tmp":user_,"j_password_tmp":pass_}
         data_login = {"j_username": user_, "j_password": pass_}
-        s.post(url, headers=headers, data=data_login)
+        yield Call(send, "POST", url, headers=headers, data=data_login)
 
-        # print(r2)
-        url = self.__addr + "/itim/rest/systemusers/me"
-        r3 = s.get(url, headers=headers)
+        url = self.addr + "/itim/rest/systemusers/me"
+        r3 = yield Call(send, "GET", url, headers=headers)
         try:
-            CSRF = r3.headers["CSRFToken"]
+            return r3.headers["CSRFToken"]
         except KeyError:
-            # print(user_, pass_)
             raise AuthenticationError(
                 "Error de autenticación, verifique sus credenciales."
             )
-        return s, CSRF
 
+    @operation
+    def request(self, method, url, **kwargs):
+        """
+        Envía la petición con la sesión actual.
+
+        Si ISIM pide login (la sesión expiró), vuelve a autenticarse una vez,
+        actualiza el token CSRF y repite la petición.
+        """
+        csrf = self.CSRF
+        r = yield Call(self._send, method, url, **kwargs)
+        if not self.reauthenticate or not self.login_required(r):
+            return r
+
+        yield Call(self._relogin, csrf)
+
+        headers = kwargs.get("headers")
+        if headers and "CSRFToken" in headers:
+            kwargs["headers"] = {**headers, "CSRFToken": self.CSRF}
+
+        return (yield Call(self._send, method, url, **kwargs))
+
+    @staticmethod
+    def login_required(response):
+        # sesión expirada: ISIM responde 401 o la página de login (HTML) en vez de JSON
+        if response.status_code == 401:
+            return True
+        content_type = response.headers.get("Content-Type", "")
+        return "json" not in content_type and "ISIMLoginRequired" in response.text
+
+    @operation
     def search_containers(
         self, profile_name, filtro, buscar_por=None, attributes="", limit=100
     ):
 
-        url = self.__addr + "/itim/rest/organizationcontainers/" + profile_name
+        url = self.addr + "/itim/rest/organizationcontainers/" + profile_name
         tipos = [
             "bporganizations",
             "organizationunits",
@@ -80,18 +185,29 @@ class ISIMClient:
             buscar_por = name_attrs[profile_name]
 
         data = {"attributes": attributes, "limit": limit, buscar_por: filtro}
-        res = self.s.get(url, params=data)
+        res = yield Call(self.request, "GET", url, params=data)
 
         return res.json()
 
     # si filtro="*" busca todo
+    @operation
     def search_people(
-        self, perfil, atributos="cn", embedded="", buscar_por="cn", filtro="*", limit=50
+        self,
+        perfil,
+        atributos="cn",
+        embedded="",
+        buscar_por="cn",
+        filtro="*",
+        limit=50,
+        strict=False,
     ):
+        """
+        Con strict=True los errores se propagan en vez de retornar una lista vacía.
+        """
 
         assert perfil.lower() in ("person", "bpperson")
 
-        url = self.__addr + "/itim/rest/people"
+        url = self.addr + "/itim/rest/people"
         if perfil.lower() == "bpperson":
             url = url + "/bpperson"
 
@@ -105,19 +221,71 @@ class ISIMClient:
         data = urlencode(data, quote_via=urllib.parse.quote)
 
         try:
-            response = self.s.get(url, params=data, headers=headers).text
+            response = (
+                yield Call(self.request, "GET", url, params=data, headers=headers)
+            ).text
             if response.find("ISIMLoginRequired") != -1:
-                # TODO handle this
+                # solo llega aquí si reauthenticate=False o el nuevo login falló
                 raise Exception("Please login.")
             personas = json.loads(response)
         except Exception:
+            if strict:
+                raise
             personas = []
 
         return list(personas)
 
+    @operation
+    def search_people_page(
+        self,
+        perfil,
+        atributos="cn",
+        embedded="",
+        buscar_por="cn",
+        filtro="*",
+        start=0,
+        count=100,
+    ):
+        """
+        Una página de la búsqueda de personas, usando el encabezado Range del API REST.
+        Retorna (personas, total). total es None si el servidor no devolvió Content-Range (sin paginación):
+        en ese caso se reciben a lo sumo count personas, por el parámetro limit.
+        """
+
+        assert perfil.lower() in ("person", "bpperson")
+
+        url = self.addr + "/itim/rest/people"
+        if perfil.lower() == "bpperson":
+            url = url + "/bpperson"
+
+        data = {
+            "attributes": atributos,
+            "embedded": embedded,
+            buscar_por: filtro,
+            "limit": count,
+        }
+        headers = {
+            "Cache-Control": "no-cache",
+            "Range": f"items={start}-{start + count - 1}",
+        }
+        data = urlencode(data, quote_via=urllib.parse.quote)
+
+        r = yield Call(self.request, "GET", url, params=data, headers=headers)
+        personas = r.json() if r.content else []
+
+        # ej. Content-Range: items 0-99/4520
+        total = None
+        content_range = r.headers.get("Content-Range", "")
+        if "/" in content_range:
+            total = content_range.split("/")[-1].strip()
+            total = int(total) if total.isdigit() else None
+
+        return list(personas), total
+
+    @operation
     def add_person(self, person, profile, orgid, justification):
 
-        url = self.__addr + "/itim/rest/people"
+        url = self.addr + "/itim/rest/people"
 
         data = {
             "justification": justification,
@@ -133,11 +301,12 @@ class ISIMClient:
             # "X-HTTP-Method-Override": "submit-in-batch" FP2
         }
 
-        ret = self.s.post(url, json=data, headers=headers)
+        ret = yield Call(self.request, "POST", url, json=data, headers=headers)
         return ret
 
+    @operation
     def modify_person(self, href, changes, justification):
-        url = self.__addr + href
+        url = self.addr + href
 
         data = {
             "justification": justification,
@@ -150,9 +319,10 @@ class ISIMClient:
             "Accept": "*/*",
         }
 
-        ret = self.s.put(url, json=data, headers=headers)
+        ret = yield Call(self.request, "PUT", url, json=data, headers=headers)
         return ret
 
+    @operation
     def search_access(
         self,
         by="accessName",
@@ -162,7 +332,7 @@ class ISIMClient:
         requestee_href=None,
     ):
 
-        url = self.__addr + "/itim/rest/access"
+        url = self.addr + "/itim/rest/access"
 
         data = {
             by: filtro,
@@ -172,7 +342,7 @@ class ISIMClient:
         }
         data = urlencode(data, quote_via=urllib.parse.quote)
 
-        res = self.s.get(url, params=data)
+        res = yield Call(self.request, "GET", url, params=data)
 
         return res.json()
 
@@ -194,9 +364,10 @@ class ISIMClient:
 
         return {"_links": {tipo: {"href": json_["_links"]["self"]["href"]}}}
 
+    @operation
     def search_activity(self, search_attr="activityName", search_filter="*"):
 
-        url = self.__addr + "/itim/rest/activities"
+        url = self.addr + "/itim/rest/activities"
         data = {
             "filterId": "activityFilter",
             "status": "PENDING",
@@ -205,12 +376,13 @@ class ISIMClient:
 
         headers = {"Cache-Control": "no-cache"}
 
-        actividades = self.s.get(url, params=data, headers=headers)
+        actividades = yield Call(self.request, "GET", url, params=data, headers=headers)
 
         return actividades.json()
 
+    @operation
     def request_access(self, accesos, persona, justification):
-        url = self.__addr + "/itim/rest/access/assignments"
+        url = self.addr + "/itim/rest/access/assignments"
 
         persona_rest = {"self": {"href": persona.href}}
 
@@ -238,62 +410,23 @@ class ISIMClient:
         }
 
         # print(data)
-        return self.s.post(url, json=data, headers=headers)
+        return (yield Call(self.request, "POST", url, json=data, headers=headers))
 
+    @operation
     def parse_rfi_form(self, workitem_id, rfi_values):
 
-        response = self.s.get(
-            f"{self.__addr}/itim/rest/activities/rfiformdetails/{workitem_id}"
+        response = yield Call(
+            self.request,
+            "GET",
+            f"{self.addr}/itim/rest/activities/rfiformdetails/{workitem_id}",
         )
         form_details = json.loads(response.text)
-        # esto es un arreglo con la info del formulario
-        form = form_details["template"]["page"]["body"]["tabbedForm"]["tab"]
-
-        rfi_form = []
-        for tab in form:
-            for element in tab["formElement"]:
-                attr_name = element["name"].split(".")[-1]
-                editable = element["editable"]
-                value = ""
-
-                try:
-                    required = element["required"]
-                except KeyError:
-                    required = False
-
-                if required:
-                    try:
-                        value = form_details["defaultAttrValues"][attr_name]
-                    except KeyError:
-                        pass
-                if editable:
-                    value = [
-                        attr["value"]
-                        for attr in rfi_values
-                        if attr["name"] == attr_name
-                    ][0]
-
-                if editable or required:
-                    rfi_form.append(
-                        {
-                            "name": attr_name,
-                            "value": value,
-                        }
-                    )
-
-        return rfi_form
+        return build_rfi_form(form_details, rfi_values)
 
+    @operation
     def complete_activities(self, actividades, resultado, justification="ok"):
 
-        url = self.__addr + "/itim/rest/workitems"
-
-        resultCodes = {
-            "approve": "AA",
-            "reject": "AR",
-            "successful": "SS",
-            "warning": "SW",
-            "failure": "SF",
-        }
+        url = self.addr + "/itim/rest/workitems"
 
         body = []
 
@@ -304,40 +437,17 @@ class ISIMClient:
             return None
 
         for activity in actividades:
-            activityType = activity["_attributes"]["type"]
-            activityLabel = activity["_attributes"]["name"]
-            workitem = activity["_links"]["workitem"]["href"]
-
-            if activityType == "APPROVAL":
-                assert resultado in ["approve", "reject"]
-            elif activityType == "WORK_ORDER":
-                assert resultado in ["successful", "warning", "failure"]
-            elif activityType == "RFI":
-                assert isinstance(resultado, list)
-
-            resultCode = resultCodes[resultado] if activityType != "RFI" else "RS"
-            action = {
-                "_links": {"self": {"href": workitem}},
-                "action": {"code": resultCode},
-                "label": activityLabel,
-                "justification": justification,
-            }
-
-            if activityType == "RFI":
+            action = workitem_action(activity, resultado, justification)
 
-                assert len(actividades) == 1, "Can only complete one RFI at a time"
+            if activity["_attributes"]["type"] == "RFI":
 
-                workitem_id = workitem.split("/")[-1]
+                assert len(actividades) == 1, "Can only complete one RFI at a time"
 
-                action = {
-                    "action": {"code": resultCode},
-                    "label": activityLabel,
-                    "justification": justification,
-                }
+                workitem_id = action.pop("_links")["self"]["href"].split("/")[-1]
 
                 if len(resultado) > 0:
 
-                    rfi_form = self.parse_rfi_form(workitem_id, resultado)
+                    rfi_form = yield Call(self.parse_rfi_form, workitem_id, resultado)
                     action["rfiAttributeValues"] = rfi_form
 
                 headers = {
@@ -346,7 +456,15 @@ class ISIMClient:
                     "Accept": "*/*",
                 }
 
-                return self.s.put(f"{url}/{workitem_id}", json=action, headers=headers)
+                return (
+                    yield Call(
+                        self.request,
+                        "PUT",
+                        f"{url}/{workitem_id}",
+                        json=action,
+                        headers=headers,
+                    )
+                )
 
             body.append(action)
 
@@ -358,22 +476,24 @@ class ISIMClient:
             "methodOverride": "submit-in-batch",
         }
 
-        return self.s.put(url, json=body, headers=headers)
+        return (yield Call(self.request, "PUT", url, json=body, headers=headers))
 
+    @operation
     def search_form(self, perfil):
 
-        url = self.__addr + "/itim/rest/forms/people"
+        url = self.addr + "/itim/rest/forms/people"
 
         assert perfil in ["Person", "BPPerson"], "Invalid profile."
 
         urlPerfil = url + "/" + perfil
-        form = self.s.get(urlPerfil).json()
+        form = (yield Call(self.request, "GET", urlPerfil)).json()
 
         return form["template"]["page"]["body"]["tabbedForm"]["tab"]
 
+    @operation
     def search_service(self, search_attr, search_filter, limit, atributos=""):
 
-        url = self.__addr + "/itim/rest/services"
+        url = self.addr + "/itim/rest/services"
 
         data = {
             search_attr: search_filter,
@@ -382,13 +502,13 @@ class ISIMClient:
         }
         data = urlencode(data, quote_via=urllib.parse.quote)
 
-        servicios = self.s.get(url, params=data)
+        servicios = yield Call(self.request, "GET", url, params=data)
 
         return servicios.json()
 
     # def eliminarServicio(self, nombre):
 
-    #     url = self.__addr + "/itim/rest/services"
+    #     url = self.addr + "/itim/rest/services"
 
     #     servicio = self.buscarServicio(nombre)
     #     servicio_href = servicio[0]["_links"]["self"]["href"]
@@ -405,28 +525,31 @@ class ISIMClient:
 
     #     return self.s.delete(url_del, headers=headers)
 
+    @operation
     def lookup_request(self, requestID):
-        url = self.__addr + "/itim/rest/requests"
+        url = self.addr + "/itim/rest/requests"
 
         url_req = url + "/" + requestID
         data = {"attributes": "*"}
 
-        solicitud = self.s.get(url_req, params=data)
+        solicitud = yield Call(self.request, "GET", url_req, params=data)
 
         return solicitud.json()
 
+    @operation
     def lookup_activity(self, activityID):
-        url = self.__addr + "/itim/rest/activities"
+        url = self.addr + "/itim/rest/activities"
 
         url_act = url + "/" + activityID
         data = {"attributes": "*"}
 
-        actividad = self.s.get(url_act, params=data)
+        actividad = yield Call(self.request, "GET", url_act, params=data)
 
         return actividad.json()
 
+    @operation
     def lookup_person(self, href, attributes="dn", embedded="", forms=False):
-        url = self.__addr + href
+        url = self.addr + href
 
         params = {
             "attributes": attributes,
@@ -434,64 +557,151 @@ class ISIMClient:
             "embedded": embedded,
         }
 
-        person = self.s.get(url, params=params)
+        person = yield Call(self.request, "GET", url, params=params)
 
         return person.json()
 
+    @operation
     def lookup_current_person(self, attributes="*", embedded=""):
-        url = self.__addr + "/itim/rest/people/me"
+        url = self.addr + "/itim/rest/people/me"
 
         params = {
             "attributes": attributes,
             "embedded": embedded,
         }
 
-        person = self.s.get(url, params=params)
+        person = yield Call(self.request, "GET", url, params=params)
 
         return json.loads(person.text)
 
+    @operation
     def lookup_access(self, id):
-        url = self.__addr + f"/itim/rest/access/{id}"
-        person = self.s.get(url)
+        url = self.addr + f"/itim/rest/access/{id}"
+        person = yield Call(self.request, "GET", url)
 
         return person.json()
 
+    @operation
     def get_access_owners(self, id, attributes="*", embedded=""):
-        url = self.__addr + f"/itim/rest/access/{id}/owners"
+        url = self.addr + f"/itim/rest/access/{id}/owners"
 
         params = {
             "attributes": attributes,
             "embedded": embedded,
         }
 
-        people = self.s.get(url, params=params)
+        people = yield Call(self.request, "GET", url, params=params)
 
         return people.json()
 
+    @operation
     def lookup_organizational_container(
         self, category, id, attributes="dn", embedded=""
     ):
-        url = self.__addr + f"/itim/rest/organizationcontainers/{category}/{id}"
+        url = self.addr + f"/itim/rest/organizationcontainers/{category}/{id}"
 
         params = {
             "attributes": attributes,
             "embedded": embedded,
         }
 
-        ous = self.s.get(url, params=params)
+        ous = yield Call(self.request, "GET", url, params=params)
 
         return ous.json()
 
-    def lookup_person_dn(self,dn,attributes="*",embedded=""):
-        url = self.__addr + f"/itim/rest/people/person"
+    @operation
+    def lookup_person_dn(self, dn, attributes="*", embedded=""):
+        url = self.addr + f"/itim/rest/people/person"
 
         params = {
-            "distinguishedName;x-property":dn,
+            "distinguishedName;x-property": dn,
             "attributes": attributes,
             "embedded": embedded,
         }
         data = urlencode(params, quote_via=urllib.parse.quote)
 
-        person = self.s.get(url, params=data)
+        person = yield Call(self.request, "GET", url, params=data)
+
+        return person.json()
+
 
-        return person.json()
\ No newline at end of file
+class ISIMClient(BaseClient):
+    def __init__(
+        self,
+        url,
+        user_,
+        pass_,
+        cert_path=None,
+        pool=None,
+        state=None,
+        reauthenticate=True,
+        limiter=None,
+    ):
+
+        self.addr = url
+        self.pool = pool or ConnectionPool()
+        self.reauthenticate = reauthenticate
+        self.limiter = limiter
+        self.__credentials = (user_, pass_, cert_path)
+        self.__login_lock = threading.Lock()
+        if state and self.resume(state, cert_path):
+            return
+        self.s, self.CSRF = self.login(user_, pass_, cert_path)
+
+    def login(self, user_, pass_, cert=None):
+
+        assert cert is not None, "No certificate passed"
+        s = self.pool.session(cert)
+        return s, run(self._login(s.request, user_, pass_))
+
+    def _relogin(self, csrf):
+        with self.__login_lock:
+            # otro hilo pudo haber renovado la sesión mientras tanto
+            if self.CSRF == csrf:
+                self.s, self.CSRF = self.login(*self.__credentials)
+
+    def _send(self, method, url, **kwargs):
+        if self.limiter is None:
+            return self.s.request(method, url, **kwargs)
+
+        with self.limiter.slot() as slot:
+            r = self.s.request(method, url, **kwargs)
+            slot.failed = r.status_code >= 500
+        return r
+
+    def export_state(self):
+        # cookies de la sesión (JSESSIONID, LTPA) y token CSRF
+        cookies = [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+            for c in self.s.cookies
+        ]
+        return {"cookies": cookies, "CSRF": self.CSRF}
+
+    def resume(self, state, cert=None):
+        """
+        Retoma una sesión exportada con export_state().
+        Retorna False si la sesión ya expiró en el servidor.
+        """
+        assert cert is not None, "No certificate passed"
+        s = self.pool.session(cert)
+        for c in state["cookies"]:
+            s.cookies.set(c["name"], c["value"], domain=c["domain"], path=c["path"])
+
+        CSRF = self.__check_session(s)
+        if not CSRF:
+            return False
+
+        self.s, self.CSRF = s, CSRF
+        return True
+
+    def is_alive(self):
+        """
+        Verifica (con una sola petición) que la sesión siga activa en el servidor.
+        """
+        return self.__check_session(self.s) is not None
+
+    def __check_session(self, s):
+        # systemusers/me solo devuelve el token CSRF si la sesión es válida
+        url = self.addr + "/itim/rest/systemusers/me"
+        r = s.get(url, headers={"Accept": "*/*"})
+        return r.headers.get("CSRFToken")
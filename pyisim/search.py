@@ -1,5 +1,10 @@
-from pyisim.entities.role import Role
-from pyisim.exceptions import InvalidOptionError
+from pyisim.entities.activity import activities_from_ws
+from pyisim.entities.organizational_container import _load_containers
+from pyisim.entities.person import _load_embedded_containers
+from pyisim.entities.role import Role, role_from_ws, roles_by_id
+from pyisim.exceptions import InvalidOptionError, SizeLimitExceededError
+from pyisim.steps import Call, is_async, operation, run
+from pyisim.utils import escape_filter_value
 from pyisim.entities import (
     Activity,
     Access,
@@ -13,12 +18,203 @@ from pyisim.entities import (
     Account,
 )
 
-from typing import List, TYPE_CHECKING
+import string
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TYPE_CHECKING,
+)
 
 if TYPE_CHECKING:
     from pyisim.auth import Session
 
+# caracteres con los que se subdividen las búsquedas particionadas
+PARTITION_ALPHABET = string.ascii_lowercase + string.digits + "áéíóúñü .-_"
+
+
+def _partitioned_search(
+    fetch: Callable[[str, bool], list],
+    key: Callable,
+    prefix: str,
+    size_limit: int,
+    alphabet: str,
+    max_workers: int,
+    rest_size_limit: int = None,
+) -> list:
+    """
+    Runs fetch(prefix, rest) over disjoint prefix ranges of the search attribute, concurrently.
+
+    fetch(prefix, False) must return the entries whose value starts with prefix.
+    fetch(prefix, True) must return the ones starting with prefix that do not continue with
+    a character of the alphabet (ex. the value equal to prefix).
+
+    Partitions that reach size_limit are split by the next character. Results are merged
+    and deduplicated with key.
+
+    Raises SizeLimitExceededError if a rest partition (which cannot be split) reaches
+    rest_size_limit (size_limit if None, for fetches whose rest searches have their own server cap).
+    Errors of fetch are raised as well, so a failed partition is never taken as empty.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(fetch, prefix, False): (prefix, False)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    part_prefix, rest = pending.pop(future)
+                    part = future.result()
+                    for r in part:
+                        results.setdefault(key(r), r)
+
+                    if rest:
+                        if len(part) < (rest_size_limit or size_limit):
+                            continue
+                        raise SizeLimitExceededError(
+                            f"The values starting with '{part_prefix}' that do not continue with a character of the alphabet "
+                            f"reached the size limit ({len(part)} results) and may be truncated. Increase it or extend the alphabet."
+                        )
+                    if len(part) < size_limit:
+                        continue
+
+                    # el servidor truncó los resultados: subdividir
+                    children = [(part_prefix, True)] + [
+                        (part_prefix + c, False) for c in alphabet
+                    ]
+                    for child in children:
+                        pending[executor.submit(fetch, *child)] = child
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    return list(results.values())
+
+
+def _remainder_filter(attribute: str, prefix: str, alphabet: str) -> str:
+    # valores que no siguen con ningún caracter del alfabeto (o sin el atributo)
+    children = "".join(
+        f"({attribute}={escape_filter_value(prefix + c)}*)" for c in alphabet
+    )
+    return f"(!(|{children}))" if children else ""
+
+
+def _with_dn(attributes: str) -> str:
+    # el DN siempre se pide explícitamente para no tener que buscarlo persona por persona
+    if "dn" in attributes.lower().split(","):
+        return attributes
+    return attributes + ",dn" if attributes else "dn"
+
+
+def _check_paged(page: list, total: int, page_size: int) -> None:
+    # sin Content-Range el servidor no pagina: una primera página llena puede estar truncada
+    if total is None and len(page) >= page_size:
+        raise SizeLimitExceededError(
+            f"The server did not page the search (no Content-Range) and returned a full page "
+            f"({len(page)} results), so the results may be truncated. Increase page_size or use people(partitioned=True)."
+        )
+
+
+def _people_pages(
+    session: "Session",
+    by: str,
+    search_filter: str,
+    profile_name: str,
+    attributes: str,
+    embedded: List[str],
+    page_size: int,
+) -> Callable[[int], Any]:
+    # fetch(start): la página de personas que empieza en start, ver restclient.search_people_page
+    def fetch(start):
+        return session.restclient.search_people_page(
+            profile_name,
+            atributos=_with_dn(attributes),
+            embedded=",".join(embedded) if embedded else "",
+            buscar_por=by,
+            filtro=search_filter,
+            start=start,
+            count=page_size,
+        )
+
+    return fetch
+
 
+def _next_start(page: list, total: int, start: int) -> Optional[int]:
+    # inicio de la página siguiente, o None si page es la última
+    start += len(page)
+    if page and total is not None and start < total:
+        return start
+    return None
+
+
+def _person_key(p) -> str:
+    # resultados REST (dict) o SOAP (WSPerson) de la misma persona
+    if isinstance(p, dict):
+        return p["_attributes"].get("dn", p["_links"]["self"]["href"]).lower()
+    return p["itimDN"].lower()
+
+
+def _bulk_search(
+    fetch: Callable[[str], list],
+    attribute: str,
+    values: Iterable[Any],
+    chunk_size: int,
+    max_workers: int,
+) -> Dict[Any, Any]:
+    """
+    Searches the values in chunks of (|(attribute=v1)(attribute=v2)...) filters, concurrently.
+
+    Returns a value -> SOAP object mapping (case insensitive match, first result wins).
+    Values without results are left out.
+    """
+    wanted = {str(v).lower(): v for v in values}
+    unique = list(wanted.values())
+    chunks = [unique[i : i + chunk_size] for i in range(0, len(unique), chunk_size)]
+
+    def search_chunk(chunk):
+        terms = "".join(f"({attribute}={escape_filter_value(str(v))})" for v in chunk)
+        return fetch(f"(|{terms})")
+
+    found = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for results in executor.map(search_chunk, chunks):
+            for r in results:
+                for a in r["attributes"]["item"]:
+                    if a["name"].lower() != attribute.lower():
+                        continue
+                    for v in a["values"]["item"] or []:
+                        value = wanted.get(str(v).lower())
+                        if value is not None:
+                            found.setdefault(value, r)
+
+    return found
+
+
+def _account_search_args(
+    session: "Session", ldap_search_filter: str, service: "Service" = None
+):
+    # pasos para armar los argumentos de searchAccounts
+    args = {"filter": ldap_search_filter}
+
+    if service:
+        # el perfil se memoriza en el cliente SOAP
+        args["profile"] = yield Call(
+            session.soapclient.get_account_profile_for_service, service.dn
+        )
+        # solo las cuentas del servicio viajan por la red
+        service_dn = escape_filter_value(service.dn)
+        args["filter"] = f"(&{ldap_search_filter}(erservice={service_dn}))"
+
+    return args
+
+
+@operation
 def groups(
     session: "Session",
     by: str,
@@ -49,8 +245,11 @@ def groups(
     elif by == "access":
         raise NotImplementedError
     elif by == "service":
-        ret = session.soapclient.get_groups_by_service(
-            service_dn, group_profile_name, group_info
+        ret = yield Call(
+            session.soapclient.get_groups_by_service,
+            service_dn,
+            group_profile_name,
+            group_info,
         )
     else:
         raise InvalidOptionError("Invalid option")
@@ -58,6 +257,7 @@ def groups(
     return [Group(session, group=g) for g in ret]
 
 
+@operation
 def people(
     session: "Session",
     by="cn",
@@ -67,10 +267,23 @@ def people(
     embedded: List[str] = None,
     roles=False,
     limit=50,
+    partitioned=False,
+    alphabet=PARTITION_ALPHABET,
+    max_workers=8,
+    lazy=False,
+    remainder_limit=1000,
 ) -> List[Person]:
     """
     Person search
 
+    With partitioned=True the search is split into prefix ranges of the "by" attribute
+    (cn=a*, cn=b*, ...), subdividing any range that reaches the limit, so full enumerations
+    are not truncated by the server. Ranges run concurrently and results are deduplicated.
+    search_filter must then be a prefix filter ("*", "Juan*").
+    The values of each range that do not continue with a character of the alphabet
+    (ex. "o'brien" in the "o" range) are searched through the SOAP API, which supports
+    negated filters. Those people come with every attribute and their REST href is looked up on first use.
+
     Args:
         session (Session): Active ISIM Session
         search_filter (str, optional): Filter to search by. Defaults to "*".
@@ -79,30 +292,164 @@ def people(
         attributes (str, optional): Attributes to return in the Person instance. Defaults to "*".
         embedded (List[str], optional): Attributes to embed as PyISIM entities. Can only support "Person" attributes (ersponsor, manager, etc).
         roles (bool, optional): If true, returns the roles as embedded PyISIM entities. They will be stored in the "embedded" attribute. Defaults to false.
-        limit (int, optional): Defaults to 50.
+        limit (int, optional): Defaults to 50. When partitioned, results per range.
+        partitioned (bool, optional): Split the search in prefix ranges. Defaults to False.
+        alphabet (str, optional): Characters ranges are split by. Defaults to PARTITION_ALPHABET.
+        max_workers (int, optional): Ranges searched at the same time. Defaults to 8.
+        lazy (bool, optional): Return lazy people: only cn and dn are requested (unless attributes says otherwise) and the rest are loaded on first access. Defaults to False.
+        remainder_limit (int, optional): When partitioned, server size limit of the SOAP searches the values that do not continue with a character of the alphabet are looked up with. Defaults to 1000.
+
+    Raises:
+        SizeLimitExceededError: When partitioned, if the values of a range that cannot be split further reach remainder_limit.
+        NotImplementedError: If partitioned or lazy on an AsyncSession.
 
     Returns:
         List[Person]: Search results
     """
+    if (partitioned or lazy) and is_async(session):
+        raise NotImplementedError(
+            "Partitioned and lazy person searches are only available on Session."
+        )
+
+    embedded_attrs = embedded
     if embedded:
         embedded = ",".join(embedded)
+    if lazy and attributes == "*":
+        attributes = "cn"
+    if roles and attributes != "*" and "erroles" not in attributes.lower().split(","):
+        # los roles se embeben a partir de erroles: sin él, cada persona perezosa se consultaría entera
+        attributes = attributes + ",erroles" if attributes else "erroles"
+
+    def fetch(filtro):
+        return session.restclient.search_people(
+            profile_name,
+            atributos=_with_dn(attributes),
+            embedded=embedded or "",
+            buscar_por=by,
+            filtro=filtro,
+            limit=limit,
+            strict=partitioned,
+        )
+
+    if partitioned:
+        prefix = search_filter[:-1] if search_filter.endswith("*") else None
+        if prefix is None or "*" in prefix:
+            raise ValueError('Partitioned searches require a prefix filter ("abc*").')
+
+        profile_filter = (
+            "(objectclass=erBPPersonItem)" if profile_name.lower() == "bpperson" else ""
+        )
+
+        def fetch_range(prefix, rest):
+            if rest:
+                # el filtro REST no admite negaciones: el resto se busca por SOAP
+                part = f"({by}={escape_filter_value(prefix)}*)"
+                remainder = _remainder_filter(by, prefix, alphabet)
+                return session.soapclient.search_people(
+                    f"(&{profile_filter}{part}{remainder})", find_unique=False
+                )
+            return fetch(prefix + "*")
+
+        ret = _partitioned_search(
+            fetch_range,
+            key=_person_key,
+            prefix=prefix.lower(),
+            size_limit=limit,
+            alphabet=alphabet,
+            max_workers=max_workers,
+            # el resto se busca por SOAP, con su propio límite
+            rest_size_limit=remainder_limit,
+        )
+    else:
+        ret = yield Call(fetch, search_filter)
+        if is_async(session):
+            # en asyncio las personas no pueden consultar sus contenedores al construirse: se cargan antes
+            yield from _load_embedded_containers(session, ret)
+
+    personas = []
+    for p in ret:
+        if isinstance(p, dict):
+            personas.append(Person(session, person=p, lazy=lazy))
+        else:
+            # resultados SOAP: se embeben por separado
+            person = Person(session, ws_person=p, lazy=lazy)
+            if embedded_attrs:
+                yield Call(person.get_embedded, session, embedded_attrs)
+            personas.append(person)
 
-    ret = session.restclient.search_people(
-        profile_name,
-        atributos=attributes,
-        embedded=embedded or "",
-        buscar_por=by,
-        filtro=search_filter,
-        limit=limit,
-    )
-    personas = [Person(session, person=p) for p in ret]
     if roles:
+        # los roles de todas las personas se resuelven juntos, una vez cada uno
+        role_dns = []
         for p in personas:
-            p.get_embedded(session, roles=True)
+            # erroles se pidió en la búsqueda: si falta, la persona no tiene roles
+            if lazy:
+                p.__dict__.setdefault("erroles", [])
+            erroles = vars(p).get("erroles", [])
+            role_dns.extend([erroles] if isinstance(erroles, str) else erroles)
+        role_map = yield Call(roles_by_id, session, role_dns)
+
+        for p in personas:
+            yield Call(p.get_embedded, session, roles=True, roles_by_id=role_map)
 
     return personas
 
 
+def iter_people(
+    session: "Session",
+    by="cn",
+    search_filter="*",
+    profile_name="Person",
+    attributes="*",
+    embedded: List[str] = None,
+    page_size=100,
+    prefetch=True,
+    lazy=False,
+) -> Iterator[Person]:
+    """
+    Paginated person search. Yields people one by one, requesting one page at a time,
+    so memory stays flat no matter how many people match.
+
+    Args:
+        session (Session): Active ISIM Session
+        by (str, optional): LDAP Attribute to search by. Defaults to "cn".
+        search_filter (str, optional): Filter to search by. Defaults to "*".
+        profile_name (str, optional): Limits the search scope. Defaults to "Person", which returns both Person and BPPerson entities.
+        attributes (str, optional): Attributes to return in the Person instance. Defaults to "*".
+        embedded (List[str], optional): Attributes to embed as PyISIM entities. Can only support "Person" attributes (ersponsor, manager, etc).
+        page_size (int, optional): People requested per page. Defaults to 100.
+        prefetch (bool, optional): Request the next page while the current one is being consumed. Defaults to True.
+        lazy (bool, optional): Yield lazy people. See people(). Defaults to False.
+
+    Raises:
+        SizeLimitExceededError: If the server does not page the search (no Content-Range) and the first page is full.
+
+    Yields:
+        Person: Search results
+    """
+    if lazy and attributes == "*":
+        attributes = "cn"
+    fetch = _people_pages(
+        session, by, search_filter, profile_name, attributes, embedded, page_size
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page, total = fetch(0)
+        _check_paged(page, total, page_size)
+        start = 0
+        while True:
+            start = _next_start(page, total, start)
+            more = start is not None
+            next_page = executor.submit(fetch, start) if more and prefetch else None
+
+            for p in page:
+                yield Person(session, person=p, lazy=lazy)
+
+            if not more:
+                break
+            page, total = next_page.result() if next_page else fetch(start)
+
+
+@operation
 def provisioning_policy(
     session: "Session", name: str, parent: OrganizationalContainer
 ) -> List[ProvisioningPolicy]:
@@ -119,12 +466,21 @@ def provisioning_policy(
     """
 
     wsou = parent.wsou
-    results = session.soapclient.search_provisioning_policy(
-        wsou, nombre_politica=name, find_unique=False
+    results = yield Call(
+        session.soapclient.search_provisioning_policy,
+        wsou,
+        nombre_politica=name,
+        find_unique=False,
     )
-    return [ProvisioningPolicy(session, provisioning_policy=p) for p in results]
+    policies = [ProvisioningPolicy(session, provisioning_policy=p) for p in results]
+    if is_async(session):
+        # en asyncio policy.ou no puede consultar el contenedor al usarlo: se carga antes
+        yield from _load_containers(session, [(p.ou_dn, None) for p in policies])
+
+    return policies
 
 
+@operation
 def roles(session: "Session", by="errolename", search_filter="*") -> List[Role]:
     """
     Role search
@@ -138,20 +494,19 @@ def roles(session: "Session", by="errolename", search_filter="*") -> List[Role]:
         List[Role]: Search results. Returns both Dynamic and Static Roles.
     """
     soap = session.soapclient
-    results = soap.search_role(f"({by}={search_filter})", find_unique=False)
+    results = yield Call(soap.search_role, f"({by}={search_filter})", find_unique=False)
 
-    is_dynamic = [
-        any(filter(lambda i: i.name == "erjavascript", r.attributes.item))  # type: ignore
-        for r in results
-    ]
-    return [
-        DynamicRole(session, rol=r) if is_dynamic[i] else StaticRole(session, rol=r)
-        for i, r in enumerate(results)
-    ]
+    roles = [role_from_ws(session, r) for r in results]
+    if is_async(session):
+        # en asyncio role.parent no puede consultar el contenedor al usarlo: se carga antes
+        yield from _load_containers(session, [(r.parent_dn, None) for r in roles])
 
+    return roles
 
+
+@operation
 def activities(
-    session: "Session", by="activityName", search_filter="*"
+    session: "Session", by="activityName", search_filter="*", max_depth: int = None
 ) -> List[Activity]:
     """
     Pending Activity search
@@ -160,23 +515,35 @@ def activities(
         session (Session): Active ISIM Session
         by (str, optional): "requestId" or filters available in ISIMs REST API docs (activityId, activityName, serviceName, participantName). Defaults to "activityName".
         search_filter (str, optional): Filter to search by. Defaults to "*".
+        max_depth (int, optional): When searching by requestId, levels of child processes to walk (0: only the request process). Defaults to None (whole tree).
 
     Returns:
         List[Activity]: Search results
     """
 
     if by == "requestId":
-        results = session.soapclient.get_request_activities(search_filter)
-        return [Activity(session, id=a.id) for a in results]
+        results = yield Call(
+            session.soapclient.get_request_activities,
+            search_filter,
+            max_depth=max_depth,
+        )
+        found = activities_from_ws(session, results)
+        if is_async(session):
+            # en asyncio los datos REST no se pueden cargar al usarlos: se cargan antes, todos juntos
+            yield from Activity._load_batch(session, found, required=found)
+        return found
 
     else:
-        results = session.restclient.search_activity(
-            search_attr=by, search_filter=search_filter
+        results = yield Call(
+            session.restclient.search_activity,
+            search_attr=by,
+            search_filter=search_filter,
         )
 
         return [Activity(session, activity=a) for a in results]
 
 
+@operation
 def access(
     session: "Session", by="accessName", search_filter="*", attributes="*", limit=20
 ) -> List[Access]:
@@ -193,14 +560,19 @@ def access(
         List[Access]: Search results
     """
 
-    ret = session.restclient.search_access(
-        by=by, filtro=search_filter, atributos=attributes, limit=limit
+    ret = yield Call(
+        session.restclient.search_access,
+        by=by,
+        filtro=search_filter,
+        atributos=attributes,
+        limit=limit,
     )
     accesos = [Access(session, access=a) for a in ret]
 
     return accesos
 
 
+@operation
 def service(
     session: "Session",
     parent: OrganizationalContainer,
@@ -222,14 +594,18 @@ def service(
 
     # ret=session.restclient.buscarServicio(by,search_filter,limit,atributos=attributes)
     # servicios=[Service(session,service=s) for s in ret]
-    ret = session.soapclient.search_service(
-        parent.wsou, f"({by}={search_filter})", find_unique=False
+    ret = yield Call(
+        session.soapclient.search_service,
+        parent.wsou,
+        f"({by}={search_filter})",
+        find_unique=False,
     )
     servicios = [Service(session, service=s) for s in ret]
 
     return servicios
 
 
+@operation
 def organizational_container(
     session: "Session", profile_name: str, search_filter: str, by="name"
 ) -> List[OrganizationalContainer]:
@@ -255,32 +631,260 @@ def organizational_container(
     """
 
     buscar_por = None if by == "name" else by
-    ret = session.restclient.search_containers(
-        profile_name, buscar_por=buscar_por, filtro=search_filter, attributes="dn"
+    ret = yield Call(
+        session.restclient.search_containers,
+        profile_name,
+        buscar_por=buscar_por,
+        filtro=search_filter,
+        attributes="dn",
     )
+    if is_async(session):
+        # en asyncio los contenedores no se pueden consultar al construirse: se cargan antes
+        yield from _load_containers(
+            session,
+            [(ou["_attributes"]["dn"], ou["_links"]["self"]["href"]) for ou in ret],
+        )
 
     ous = [OrganizationalContainer(session, organizational_container=ou) for ou in ret]
 
     return ous
 
 
+@operation
 def account(
     session: "Session",
     ldap_search_filter: str,
     service: "Service" = None,
+    partition_by: str = None,
+    size_limit=1000,
+    alphabet=PARTITION_ALPHABET,
+    max_workers=8,
 ) -> List[Account]:
+    """
+    Account search
 
-    args = {"filter": ldap_search_filter}
+    With partition_by the search is split into prefix ranges of that attribute
+    ((uid=a*), (uid=b*), ...), subdividing any range that reaches size_limit, so full
+    enumerations are not truncated by the server. Ranges run concurrently and results are deduplicated by DN.
+
+    Args:
+        session (Session): Active ISIM Session
+        ldap_search_filter (str): LDAP filter. Example: "(uid=*)"
+        service (Service, optional): Limits the search to the accounts of this service. Defaults to None.
+        partition_by (str, optional): Attribute to split the search by. Example: "uid". Defaults to None (single search).
+        size_limit (int, optional): Server search result size limit. Ranges reaching it are split. Defaults to 1000.
+        alphabet (str, optional): Characters ranges are split by. Defaults to PARTITION_ALPHABET.
+        max_workers (int, optional): Ranges searched at the same time. Defaults to 8.
+
+    Returns:
+        List[Account]: Search results
+    """
+
+    if partition_by and is_async(session):
+        raise NotImplementedError(
+            "Partitioned account searches are only available on Session."
+        )
+
+    args = yield from _account_search_args(session, ldap_search_filter, service)
+
+    if partition_by:
+
+        def fetch(prefix, rest):
+            part = f"({partition_by}={escape_filter_value(prefix)}*)"
+            if rest:
+                remainder = _remainder_filter(partition_by, prefix, alphabet)
+                part = f"(&{part}{remainder})" if prefix else remainder
+            return session.soapclient.search_accounts(
+                {**args, "filter": f"(&{args['filter']}{part})"}
+            )
+
+        results = _partitioned_search(
+            fetch,
+            key=lambda a: a["itimDN"],
+            prefix="",
+            size_limit=size_limit,
+            alphabet=alphabet,
+            max_workers=max_workers,
+        )
+    else:
+        results = yield Call(session.soapclient.search_accounts, args)
 
     if service:
-        profile_name = session.soapclient.get_account_profile_for_service(service.dn)
-        args["profile"] = profile_name
-        results = session.soapclient.search_accounts(args)
         return [
             Account(session, account=r)
             for r in results
             if r["serviceName"] == service.name
         ]
     else:
-        results = session.soapclient.search_accounts(args)
         return [Account(session, account=r) for r in results]
+
+
+def iter_account(
+    session: "Session",
+    ldap_search_filter: str,
+    service: "Service" = None,
+) -> Iterator[Account]:
+    """
+    Streaming account search. The SOAP response is parsed incrementally and accounts are
+    yielded one by one, so very large result sets do not have to fit in memory.
+
+    Args:
+        session (Session): Active ISIM Session
+        ldap_search_filter (str): LDAP filter. Example: "(uid=*)"
+        service (Service, optional): Limits the search to the accounts of this service. Defaults to None.
+
+    Yields:
+        Account: Search results
+    """
+    args = run(_account_search_args(session, ldap_search_filter, service))
+
+    for r in session.soapclient.iter_search_accounts(args):
+        if not service or r["serviceName"] == service.name:
+            yield Account(session, account=r)
+
+
+def people_by_values(
+    session: "Session",
+    attribute: str,
+    values: Iterable[str],
+    chunk_size=100,
+    max_workers=8,
+) -> Dict[str, Person]:
+    """
+    Bulk person lookup. Resolves many values of an attribute (employee numbers, uids, ...)
+    with one search per chunk of values instead of one per value.
+
+    Args:
+        session (Session): Active ISIM Session
+        attribute (str): LDAP attribute to search by. Example: "employeenumber"
+        values (Iterable[str]): Values to look up.
+        chunk_size (int, optional): Values per search filter. Defaults to 100.
+        max_workers (int, optional): Chunks searched at the same time. Defaults to 8.
+
+    Returns:
+        Dict[str, Person]: Value -> Person. Values not found are left out.
+    """
+    found = _bulk_search(
+        lambda f: session.soapclient.search_people(f, find_unique=False),
+        attribute,
+        values,
+        chunk_size,
+        max_workers,
+    )
+    people = {}
+    return {
+        v: people.setdefault(r["itimDN"], Person(session, ws_person=r))
+        for v, r in found.items()
+    }
+
+
+def roles_by_values(
+    session: "Session",
+    attribute: str,
+    values: Iterable[str],
+    chunk_size=100,
+    max_workers=8,
+) -> Dict[str, Role]:
+    """
+    Bulk role lookup. Resolves many values of an attribute (role names, ...)
+    with one search per chunk of values instead of one per value.
+
+    Args:
+        session (Session): Active ISIM Session
+        attribute (str): LDAP attribute to search by. Example: "errolename"
+        values (Iterable[str]): Values to look up.
+        chunk_size (int, optional): Values per search filter. Defaults to 100.
+        max_workers (int, optional): Chunks searched at the same time. Defaults to 8.
+
+    Returns:
+        Dict[str, Role]: Value -> StaticRole or DynamicRole. Values not found are left out.
+    """
+    found = _bulk_search(
+        lambda f: session.soapclient.search_role(f, find_unique=False),
+        attribute,
+        values,
+        chunk_size,
+        max_workers,
+    )
+    roles = {}
+    return {
+        v: roles.setdefault(r["itimDN"], role_from_ws(session, r))
+        for v, r in found.items()
+    }
+
+
+def services_by_values(
+    session: "Session",
+    parent: OrganizationalContainer,
+    attribute: str,
+    values: Iterable[str],
+    chunk_size=100,
+    max_workers=8,
+) -> Dict[str, Service]:
+    """
+    Bulk service lookup. Resolves many values of an attribute (service names, ...)
+    with one search per chunk of values instead of one per value.
+
+    Args:
+        session (Session): Active ISIM Session
+        parent (OrganizationalContainer): Services business unit
+        attribute (str): LDAP attribute to search by. Example: "erservicename"
+        values (Iterable[str]): Values to look up.
+        chunk_size (int, optional): Values per search filter. Defaults to 100.
+        max_workers (int, optional): Chunks searched at the same time. Defaults to 8.
+
+    Returns:
+        Dict[str, Service]: Value -> Service. Values not found are left out.
+    """
+    wsou = parent.wsou
+    found = _bulk_search(
+        lambda f: session.soapclient.search_service(wsou, f, find_unique=False),
+        attribute,
+        values,
+        chunk_size,
+        max_workers,
+    )
+    services = {}
+    return {
+        v: services.setdefault(r["itimDN"], Service(session, service=r))
+        for v, r in found.items()
+    }
+
+
+def accounts_by_values(
+    session: "Session",
+    attribute: str,
+    values: Iterable[str],
+    service: "Service" = None,
+    chunk_size=100,
+    max_workers=8,
+) -> Dict[str, Account]:
+    """
+    Bulk account lookup. Resolves many values of an attribute (uids, ...)
+    with one search per chunk of values instead of one per value.
+
+    Args:
+        session (Session): Active ISIM Session
+        attribute (str): LDAP attribute to search by. Example: "eruid"
+        values (Iterable[str]): Values to look up.
+        service (Service, optional): Limits the search to the accounts of this service. Defaults to None.
+        chunk_size (int, optional): Values per search filter. Defaults to 100.
+        max_workers (int, optional): Chunks searched at the same time. Defaults to 8.
+
+    Returns:
+        Dict[str, Account]: Value -> Account. Values not found are left out.
+    """
+
+    def fetch(ldap_filter):
+        args = run(_account_search_args(session, ldap_filter, service))
+        results = session.soapclient.search_accounts(args)
+        if service:
+            results = [r for r in results if r["serviceName"] == service.name]
+        return results
+
+    found = _bulk_search(fetch, attribute, values, chunk_size, max_workers)
+    accounts = {}
+    return {
+        v: accounts.setdefault(r["itimDN"], Account(session, account=r))
+        for v, r in found.items()
+    }
@@ -3,77 +3,248 @@ from zeep.xsd import Nil
 from zeep.transports import Transport
 from zeep.helpers import serialize_object
 from zeep.cache import InMemoryCache
+from zeep.exceptions import Fault
+from lxml import etree
 
 # from isim_classes import StaticRole
+import copy
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from pyisim.exceptions import NotFoundError
+from pyisim.steps import Call, Parallel, operation, run
+from pyisim.transport import ConnectionPool
 
 # from pyisim.entities import OrganizationalContainer
 
 
 requests.packages.urllib3.disable_warnings()  # type: ignore
 
-
-class ISIMClient:
-    def __init__(self, url, user_, pass_, cert_path=None):
-
-        self.addr = url + "/itim/services/"
-        self.cert_path = cert_path
-        self.s = self.login(user_, pass_)
-
-    def login(self, user_, pass_):
+# WSDLs de los servicios SOAP de ISIM usados por el cliente
+SERVICES = (
+    "WSSessionService",
+    "WSAccountServiceService",
+    "WSGroupServiceService",
+    "WSOrganizationalContainerServiceService",
+    "WSPersonServiceService",
+    "WSProvisioningPolicyServiceService",
+    "WSRequestServiceService",
+    "WSRoleServiceService",
+    "WSSearchDataServiceService",
+    "WSServiceServiceService",
+)
+
+# fragmentos de los faults de ISIM cuando el WSSession ya no es válido
+SESSION_EXPIRED_MARKERS = (
+    "invalidsession",
+    "sessionexpired",
+    "session has expired",
+    "session is not valid",
+    "session is invalid",
+)
+
+
+def session_expired(fault: Fault) -> bool:
+    """
+    Indica si el fault SOAP se debe a que el WSSession expiró.
+    """
+    text = str(fault.message or "")
+    if fault.detail is not None:
+        text += etree.tostring(fault.detail, encoding="unicode")
+    text = text.lower()
+    return any(marker in text for marker in SESSION_EXPIRED_MARKERS)
+
+
+SOAPENC_NS = "http://schemas.xmlsoap.org/soap/encoding/"
+XSI_NS = "http://www.w3.org/2001/XMLSchema-instance"
+
+
+def _decode_encoded(element, refs, used=None):
+    """
+    Convierte un elemento SOAP (RPC/encoded) en dicts, listas y strings, con la misma forma
+    que los objetos de zeep (los arreglos quedan como {"item": [...]}).
+
+    Las referencias (href="#id") se resuelven con refs y sus ids se agregan a used.
+    Lanza KeyError si alguna aún no llegó.
+    """
+    href = element.get("href")
+    if href:
+        element = refs[href[1:]]
+        if used is not None:
+            used.append(href[1:])
+
+    if element.get(f"{{{XSI_NS}}}nil") in ("true", "1"):
+        return None
+
+    children = list(element)
+    xsi_type = element.get(f"{{{XSI_NS}}}type", "")
+    if element.get(f"{{{SOAPENC_NS}}}arrayType") or xsi_type.endswith(":Array"):
+        return {"item": [_decode_encoded(c, refs, used) for c in children]}
+    if not children:
+        return element.text or ""
+
+    return {etree.QName(c).localname: _decode_encoded(c, refs, used) for c in children}
+
+
+def _release(element):
+    # libera el elemento y los anteriores a él (ya procesados)
+    element.clear()
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+
+def _iter_encoded_array(stream):
+    """
+    Recorre incrementalmente la respuesta SOAP de una operación que retorna un arreglo
+    y entrega cada elemento del arreglo ya decodificado.
+
+    Cada elemento se libera al entregarlo, junto con los multiRefs que usó: Axis los
+    serializa con soapenc:root="0" y cada uno se referencia una sola vez.
+    """
+    refs = {}
+    # elementos en línea o ids de los multiRefs, en el orden del arreglo
+    pending = deque()
+    depth = 0
+
+    def flush():
+        while pending:
+            used = []
+            try:
+                if isinstance(pending[0], str):
+                    item = _decode_encoded(refs[pending[0]], refs, used)
+                    used.append(pending[0])
+                else:
+                    item = _decode_encoded(pending[0], refs, used)
+            except KeyError:
+                return
+            element = pending.popleft()
+            if not isinstance(element, str):
+                _release(element)
+            for id in used:
+                ref = refs.pop(id, None)
+                if ref is not None:
+                    _release(ref)
+            yield item
+
+    # Envelope (1) > Body (2) > xxxResponse / multiRef (3) > xxxReturn (4) > elementos (5)
+    for event, element in etree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 4 and element.getparent().getparent().get("id") is None:
+            href = element.get("href")
+            if href:
+                # solo se guarda el id: el elemento se libera de una vez
+                pending.append(href[1:])
+                _release(element)
+            else:
+                pending.append(element)
+            yield from flush()
+        elif depth == 2 and element.get("id"):
+            refs[element.get("id")] = element
+            yield from flush()
+
+    if pending:
+        raise ValueError("Respuesta SOAP con referencias sin resolver.")
+
+
+class BaseClient:
+    """
+    Operaciones del API SOAP de ISIM, comunes al cliente síncrono (ISIMClient) y al de asyncio (pyisim.aio).
+
+    Cada operación pide sus llamadas con Call(self.call, client, ...): las subclases solo implementan
+    la E/S (get_client, _send y _relogin) y el driver con que se ejecutan (ver pyisim.steps).
+    """
+
+    addr = None
+    s = None
+    reauthenticate = True
+
+    def _login(self, user_, pass_):
+        # pasos del login. Retorna el WSSession
         url = self.addr + "WSSessionService?wsdl"
-        assert self.cert_path is not None, "No certificate passed"
         client = self.get_client(url)
-        session = client.service.login(user_, pass_)
-        return session
+        return (yield Call(client.service.login, user_, pass_))
 
-    def get_client(self, url):
+    @operation
+    def call(self, client, operation, *args):
+        """
+        Invoca la operación SOAP con el WSSession actual como primer argumento.
 
-        # Si ya se inicializó el cliente especificado en client_name, lo devuelve. Si no, lo inicializa, setea y devuelve.
-        # ej. -> https://<ITIMURL>/.../WSSessionService?wsdl -> wssessionservice
-        client_name = url.split("/")[-1][:-5].lower()
-        client = getattr(self, client_name, None)
+        Si el servidor responde que la sesión expiró, vuelve a hacer login una vez y repite la llamada.
+        """
+        return (yield from self._call(self._send, client, operation, *args))
 
-        if client is None:
-            settings = Settings(strict=False)
-            s = requests.Session()
-            s.verify = self.cert_path
-            client = Client(
-                url,
-                settings=settings,
-                transport=Transport(session=s, cache=InMemoryCache()),
-            )
-            # necesario porque los WSDL de SIM queman el puerto y no funciona con balanceador
-            client.service._binding_options["address"] = url[:-5]
-            setattr(self, client_name, client)
+    def _call(self, send, client, operation, *args):
+        session = self.s
+        try:
+            return (yield Call(send, client, operation, session, *args))
+        except Fault as e:
+            if not self.reauthenticate or not session_expired(e):
+                raise
 
-        return client
+        yield Call(self._relogin, session)
+
+        return (yield Call(send, client, operation, self.s, *args))
 
+    @operation
     def lookup_container(self, dn):
 
         url = self.addr + "WSOrganizationalContainerServiceService?wsdl"
         client = self.get_client(url)
 
-        cont = client.service.lookupContainer(self.s, dn)
+        cont = yield Call(self.call, client, "lookupContainer", dn)
 
         return cont
 
+    @operation
     def search_organization(self, perfil, nombre):
 
         url = self.addr + "WSOrganizationalContainerServiceService?wsdl"
         client = self.get_client(url)
 
-        ous = client.service.searchContainerByName(self.s, Nil, perfil, nombre)
+        ous = yield Call(
+            self.call, client, "searchContainerByName", Nil, perfil, nombre
+        )
 
         return ous
 
+    @operation
+    def get_organization_tree(self):
+        """
+        Retorna todos los contenedores organizacionales (el árbol aplanado, sin hijos).
+        """
+        url = self.addr + "WSOrganizationalContainerServiceService?wsdl"
+        client = self.get_client(url)
+
+        tree = yield Call(self.call, client, "getOrganizationTree")
+
+        ous = []
+        pending = list(tree or [])
+        while pending:
+            ou = pending.pop()
+            children = getattr(ou, "children", None)
+            if children:
+                pending.extend(getattr(children, "item", children) or [])
+                # copia sin hijos (sin modificar la respuesta): al usar el contenedor en otras
+                # operaciones no se envía todo el subárbol
+                ou = copy.copy(ou)
+                ou.__values__ = copy.copy(ou.__values__)
+                ou.children = None
+            ous.append(ou)
+        return ous
+
+    @operation
     def search_provisioning_policy(self, wsou, nombre_politica, find_unique=True):
 
         url = self.addr + "WSProvisioningPolicyServiceService?wsdl"
         client = self.get_client(url)
 
-        politicas = client.service.getPolicies(self.s, wsou, nombre_politica)
+        politicas = yield Call(self.call, client, "getPolicies", wsou, nombre_politica)
 
         if find_unique:
             assert (
@@ -86,38 +257,46 @@ class ISIMClient:
         else:
             return politicas
 
+    @operation
     def add_provisioning_policy(self, ou, wsprovisioningpolicy, date):
 
         url = self.addr + "WSProvisioningPolicyServiceService?wsdl"
         client = self.get_client(url)
 
-        s = client.service.createPolicy(self.s, ou, wsprovisioningpolicy, date)
+        s = yield Call(
+            self.call, client, "createPolicy", ou, wsprovisioningpolicy, date
+        )
 
         return s
 
+    @operation
     def modify_provisioning_policy(self, ou, wsprovisioningpolicy, date):
 
         url = self.addr + "WSProvisioningPolicyServiceService?wsdl"
         client = self.get_client(url)
 
-        s = client.service.modifyPolicy(self.s, ou, wsprovisioningpolicy, date)
+        s = yield Call(
+            self.call, client, "modifyPolicy", ou, wsprovisioningpolicy, date
+        )
 
         return s
 
+    @operation
     def delete_provisioning_policy(self, ou, dn, date):
         url = self.addr + "WSProvisioningPolicyServiceService?wsdl"
         client = self.get_client(url)
 
-        s = client.service.deletePolicy(self.s, ou, dn, date)
+        s = yield Call(self.call, client, "deletePolicy", ou, dn, date)
 
         return s
 
+    @operation
     def search_role(self, filtro, find_unique=True):
 
         url = self.addr + "WSRoleServiceService?wsdl"
         client = self.get_client(url)
 
-        roles = client.service.searchRoles(self.s, filtro)
+        roles = yield Call(self.call, client, "searchRoles", filtro)
 
         if find_unique:
             assert (
@@ -128,31 +307,35 @@ class ISIMClient:
         else:
             return roles
 
+    @operation
     def lookup_role(self, dn):
 
         url = self.addr + "WSRoleServiceService?wsdl"
         client = self.get_client(url)
 
         try:
-            r = client.service.lookupRole(self.s, dn)
+            r = yield Call(self.call, client, "lookupRole", dn)
             return r
-        except:
+        except Exception:
             raise NotFoundError("Rol no encontrado")
 
+    @operation
     def create_static_role(self, wsrole, wsou):
 
         url = self.addr + "WSRoleServiceService?wsdl"
         client = self.get_client(url)
 
-        return client.service.createStaticRole(self.s, wsou, wsrole)
+        return (yield Call(self.call, client, "createStaticRole", wsou, wsrole))
 
+    @operation
     def modify_static_role(self, role_dn, wsattr_list):
 
         url = self.addr + "WSRoleServiceService?wsdl"
         client = self.get_client(url)
 
-        return client.service.modifyStaticRole(self.s, role_dn, wsattr_list)
+        return (yield Call(self.call, client, "modifyStaticRole", role_dn, wsattr_list))
 
+    @operation
     def remove_role(self, role_dn, date=None):
 
         url = self.addr + "WSRoleServiceService?wsdl"
@@ -162,26 +345,33 @@ class ISIMClient:
             raise NotImplementedError()
         else:
             date = Nil
-        return client.service.removeRole(self.s, role_dn, date)
+        return (yield Call(self.call, client, "removeRole", role_dn, date))
 
-    def search_people(self, filtro):
+    @operation
+    def search_people(self, filtro, find_unique=True):
 
         url = self.addr + "WSPersonServiceService?wsdl"
         client = self.get_client(url)
 
-        personas = client.service.searchPersonsFromRoot(self.s, filtro, Nil)
+        personas = yield Call(self.call, client, "searchPersonsFromRoot", filtro, Nil)
 
-        assert (
-            len(personas) > 0
-        ), f"No se ha encontrado la persona con el filtro: {filtro}. Verifique que sea un filtro LDAP válido."
-        assert len(personas) == 1, f"Se ha encontrado más de una persona con: {filtro}"
-        return personas[0]
+        if find_unique:
+            assert (
+                len(personas) > 0
+            ), f"No se ha encontrado la persona con el filtro: {filtro}. Verifique que sea un filtro LDAP válido."
+            assert (
+                len(personas) == 1
+            ), f"Se ha encontrado más de una persona con: {filtro}"
+            return personas[0]
+        else:
+            return personas
 
+    @operation
     def search_service(self, ou, filtro, find_unique=True):
 
         url = self.addr + "WSServiceServiceService?wsdl"
         client = self.get_client(url)
-        servicios = client.service.searchServices(self.s, ou, filtro)
+        servicios = yield Call(self.call, client, "searchServices", ou, filtro)
 
         if find_unique:
             if len(servicios) == 0:
@@ -195,12 +385,41 @@ class ISIMClient:
         else:
             return servicios
 
+    @operation
     def search_workflow(self, nombre, org_name):
         """
         Busca flujos de cuenta y acceso por el nombre.
-        Retorna el DN.
+        Retorna el DN. Los resultados se memorizan por organización (ver preload_workflows).
         """
 
+        key = (org_name.lower(), nombre.lower())
+        if key in self._workflows:
+            return self._workflows[key]
+
+        flujos = yield from self.__find_workflows(f"(erProcessName={nombre})", org_name)
+
+        assert (
+            len(flujos) > 0
+        ), f"No se ha encontrado el flujo: {nombre}. Verifique que sea un filtro LDAP válido."
+        assert len(flujos) == 1, f"Se ha encontrado más de un servicio con: {nombre}"
+
+        self._workflows[key] = flujos[0]["value"]
+        return flujos[0]["value"]
+
+    @operation
+    def preload_workflows(self, org_name):
+        """
+        Carga todos los flujos (erWorkflowDefinition) de la organización en una sola búsqueda.
+        Retorna la cantidad de flujos cargados.
+        """
+        flujos = yield from self.__find_workflows("(erProcessName=*)", org_name)
+        for f in flujos:
+            # name: nombre del flujo (erProcessName), value: DN
+            if f["name"]:
+                self._workflows[(org_name.lower(), f["name"].lower())] = f["value"]
+        return len(flujos)
+
+    def __find_workflows(self, filtro, org_name):
         url = self.addr + "WSSearchDataServiceService?wsdl"
         client = self.get_client(url)
 
@@ -215,56 +434,78 @@ class ISIMClient:
         SEPARATION_OF_DUTY_POLICY, SEPARATION_OF_DUTY_RULE, SERVICE, SERVICE_MODEL, SERVICE_PROFILE, 
         SHARED_ACCESS_POLICY, SYSTEM_ROLE, SYSTEM_USER, TENANT, USERACCESS
         """
-        flujos = client.service.findSearchControlObjects(
-            self.s,
+        flujos = yield Call(
+            self.call,
+            client,
+            "findSearchControlObjects",
             {
                 "objectclass": "erWorkflowDefinition",
                 "contextDN": f"ou=workflow,erglobalid=00000000000000000000,ou={org_name},dc={org_name}",
                 "returnedAttributeName": "dn",
-                "filter": f"(erProcessName={nombre})",
+                "filter": filtro,
                 "base": "global",
                 "category": "CustomProcess",
             },
         )
+        return flujos
 
-        assert (
-            len(flujos) > 0
-        ), f"No se ha encontrado el flujo: {nombre}. Verifique que sea un filtro LDAP válido."
-        assert len(flujos) == 1, f"Se ha encontrado más de un servicio con: {nombre}"
-
-        return flujos[0]["value"]
-
+    @operation
     def get_groups_by_service(self, dn_servicio, profile_name, info):
 
         url = self.addr + "WSGroupServiceService?wsdl"
         client = self.get_client(url)
 
-        grps = client.service.getGroupsByService(
-            self.s, dn_servicio, profile_name, info
+        grps = yield Call(
+            self.call, client, "getGroupsByService", dn_servicio, profile_name, info
         )
         return grps
 
-    def get_activities_recursive(self, process_id, act_list):
+    @operation
+    def get_activities_recursive(
+        self, process_id, act_list, max_depth=None, max_workers=8
+    ):
+        """
+        Recorre el árbol de procesos por niveles (breadth-first). Los getActivities y
+        getChildProcesses de cada nivel se hacen en paralelo, con máximo max_workers a la vez.
+
+        max_depth limita los niveles de subprocesos a recorrer (0: solo el proceso raíz).
+        """
         url = self.addr + "WSRequestServiceService?wsdl"
         client = self.get_client(url)
 
-        acts = client.service.getActivities(self.s, int(process_id), False)
-        act_list.extend(acts)
+        level = [int(process_id)]
+        depth = 0
+        while level:
+            calls = [Call(self.call, client, "getActivities", p, False) for p in level]
+            if max_depth is None or depth < max_depth:
+                calls += [
+                    Call(self.call, client, "getChildProcesses", p) for p in level
+                ]
+            results = yield Parallel(calls, max_workers=max_workers)
+
+            for a in results[: len(level)]:
+                act_list.extend(a)
+            level = [int(s.requestId) for sub in results[len(level) :] for s in sub]
+            depth += 1
 
-        subprocesses = client.service.getChildProcesses(self.s, int(process_id))
-        for s in subprocesses:
-            self.get_activities_recursive(s.requestId, act_list)
         return "ok"
 
-    def get_request_activities(self, process_id, pending_only=True):
+    @operation
+    def get_request_activities(
+        self, process_id, pending_only=True, max_depth=None, max_workers=8
+    ):
         """
         The customer can accomplish this by using a combination of getActivities() and getChildProcesses().
         """
-        # url = self.addr + "WSRequestServiceService?wsdl"
-        # client = self.get_client(url)
 
         actividades = []
-        self.get_activities_recursive(int(process_id), actividades)
+        yield Call(
+            self.get_activities_recursive,
+            int(process_id),
+            actividades,
+            max_depth=max_depth,
+            max_workers=max_workers,
+        )
 
         # Filtra solo las actividades manuales (M) y pendientes (R)
         if pending_only:
@@ -274,14 +515,16 @@ class ISIMClient:
 
         return actividades
 
+    @operation
     def suspend_person(self, dn, justification):
         # suspendPerson(session: ns1:WSSession, personDN: xsd:string, justification: xsd:string)
         url = self.addr + "WSPersonServiceService?wsdl"
         client = self.get_client(url)
 
-        r = client.service.suspendPerson(self.s, dn, justification)
+        r = yield Call(self.call, client, "suspendPerson", dn, justification)
         return r
 
+    @operation
     def restore_person(self, dn, restore_accounts, password, date, justification):
         # restorePerson(session: ns1:WSSession, personDN: xsd:string, restoreAccounts: xsd:boolean, password: xsd:string, date: xsd:dateTime, justification: xsd:string) -> restorePersonReturn: ns1:WSRequest
         url = self.addr + "WSPersonServiceService?wsdl"
@@ -292,19 +535,28 @@ class ISIMClient:
         else:
             date = Nil
 
-        r = client.service.restorePerson(
-            self.s, dn, restore_accounts, password or Nil, date, justification
+        r = yield Call(
+            self.call,
+            client,
+            "restorePerson",
+            dn,
+            restore_accounts,
+            password or Nil,
+            date,
+            justification,
         )
         return r
 
+    @operation
     def delete_person(self, dn, justification):
         # deletePerson(session: ns1:WSSession, personDN: xsd:string, date: xsd:dateTime, justification: xsd:string) -> deletePersonReturn: ns1:WSRequest
         url = self.addr + "WSPersonServiceService?wsdl"
         client = self.get_client(url)
 
-        r = client.service.deletePerson(self.s, dn, Nil, justification)
+        r = yield Call(self.call, client, "deletePerson", dn, Nil, justification)
         return r
 
+    @operation
     def create_dynamic_role(self, wsrole, wsou, date=None):
 
         url = self.addr + "WSRoleServiceService?wsdl"
@@ -315,8 +567,9 @@ class ISIMClient:
         else:
             date = Nil
 
-        return client.service.createDynamicRole(self.s, wsou, wsrole, date)
+        return (yield Call(self.call, client, "createDynamicRole", wsou, wsrole, date))
 
+    @operation
     def modify_dynamic_role(self, role_dn, wsattr_list, date=None):
 
         url = self.addr + "WSRoleServiceService?wsdl"
@@ -327,41 +580,60 @@ class ISIMClient:
         else:
             date = Nil
 
-        return client.service.modifyDynamicRole(self.s, role_dn, wsattr_list, date)
+        return (
+            yield Call(
+                self.call, client, "modifyDynamicRole", role_dn, wsattr_list, date
+            )
+        )
 
+    @operation
     def get_default_account_attributes_by_person(self, service_dn, person_dn):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
 
-        r = client.service.getDefaultAccountAttributesByPerson(
-            self.s, service_dn, person_dn
+        r = yield Call(
+            self.call,
+            client,
+            "getDefaultAccountAttributesByPerson",
+            service_dn,
+            person_dn,
         )
         return r
 
+    @operation
     def get_default_account_attributes(self, service_dn):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
 
-        r = client.service.getDefaultAccountAttributes(self.s, service_dn)
+        r = yield Call(self.call, client, "getDefaultAccountAttributes", service_dn)
         return r
 
+    @operation
     def get_account_profile_for_service(self, service_dn):
+        # el perfil de un servicio no cambia: se consulta una sola vez
+        profile = self._account_profiles.get(service_dn.lower())
+        if profile is not None:
+            return profile
+
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
 
-        r = client.service.getAccountProfileForService(self.s, service_dn)
+        r = yield Call(self.call, client, "getAccountProfileForService", service_dn)
+        self._account_profiles[service_dn.lower()] = r
         return r
 
+    @operation
     def search_accounts(self, search_arguments):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
 
         search_arguments = {k: v for k, v in search_arguments.items() if v is not None}
 
-        r = client.service.searchAccounts(self.s, search_arguments)
+        r = yield Call(self.call, client, "searchAccounts", search_arguments)
         return r
 
     # createAccount(session: ns1:WSSession, serviceDN: xsd:string, wsAttrs: ns1:WSAttribute[], date: xsd:dateTime, justification: xsd:string) -> createAccountReturn: ns1:WSRequest
+    @operation
     def create_account(self, service_dn, wsattrs, date, justification):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
@@ -371,20 +643,22 @@ class ISIMClient:
         else:
             date = Nil
 
-        r = client.service.createAccount(
-            self.s, service_dn, wsattrs, date, justification
+        r = yield Call(
+            self.call, client, "createAccount", service_dn, wsattrs, date, justification
         )
         return r
 
     # getAccountsByOwner(session: ns1:WSSession, personDN: xsd:string) -> getAccountsByOwnerReturn: ns1:WSAccount[]
+    @operation
     def get_accounts_by_owner(self, person_dn):
         url = self.addr + "WSPersonServiceService?wsdl"
         client = self.get_client(url)
 
-        r = client.service.getAccountsByOwner(self.s, person_dn)
+        r = yield Call(self.call, client, "getAccountsByOwner", person_dn)
         return r
 
     # suspendAccount(session: ns1:WSSession, accountDN: xsd:string, date: xsd:dateTime, justification: xsd:string) -> suspendAccountReturn: ns1:WSRequest
+    @operation
     def suspend_account(self, account_dn, date, justification):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
@@ -394,10 +668,13 @@ class ISIMClient:
         else:
             date = Nil
 
-        r = client.service.suspendAccount(self.s, account_dn, date, justification)
+        r = yield Call(
+            self.call, client, "suspendAccount", account_dn, date, justification
+        )
         return r
 
     # restoreAccount(session: ns1:WSSession, accountDN: xsd:string, newPassword: xsd:string, date: xsd:dateTime, justification: xsd:string) -> restoreAccountReturn: ns1:WSRequest
+    @operation
     def restore_account(self, account_dn, password, date, justification):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
@@ -407,12 +684,19 @@ class ISIMClient:
         else:
             date = Nil
 
-        r = client.service.restoreAccount(
-            self.s, account_dn, password, date, justification
+        r = yield Call(
+            self.call,
+            client,
+            "restoreAccount",
+            account_dn,
+            password,
+            date,
+            justification,
         )
         return r
 
     # deprovisionAccount(session: ns1:WSSession, accountDN: xsd:string, date: xsd:dateTime, justification: xsd:string) -> deprovisionAccountReturn: ns1:WSRequest
+    @operation
     def deprovision_account(self, account_dn, date, justification):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
@@ -422,18 +706,22 @@ class ISIMClient:
         else:
             date = Nil
 
-        r = client.service.deprovisionAccount(self.s, account_dn, date, justification)
+        r = yield Call(
+            self.call, client, "deprovisionAccount", account_dn, date, justification
+        )
         return r
 
     # orphanSingleAccount(session: ns1:WSSession, accountDN: xsd:string) ->
+    @operation
     def orphan_single_account(self, account_dn):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
 
-        r = client.service.orphanSingleAccount(self.s, account_dn)
+        r = yield Call(self.call, client, "orphanSingleAccount", account_dn)
         return r
 
     # modifyAccount(session: ns1:WSSession, accountDN: xsd:string, wsAttrs: ns1:WSAttribute[], date: xsd:dateTime, justification: xsd:string) -> modifyAccountReturn: ns1:WSRequest
+    @operation
     def modify_account(self, account_dn, wsattrs, date, justification):
         url = self.addr + "WSAccountServiceService?wsdl"
         client = self.get_client(url)
@@ -443,11 +731,12 @@ class ISIMClient:
         else:
             date = Nil
 
-        r = client.service.modifyAccount(
-            self.s, account_dn, wsattrs, date, justification
+        r = yield Call(
+            self.call, client, "modifyAccount", account_dn, wsattrs, date, justification
         )
         return r
 
+    @operation
     def suspend_person_advanced(self, person_dn, include_accounts, date, justification):
         # suspendPersonAdvanced(session: ns1:WSSession, personDN: xsd:string, includeAccounts: xsd:boolean, date: xsd:dateTime, justification: xsd:string) -> suspendPersonAdvancedReturn: ns1:WSRequest
         url = self.addr + "WSPersonServiceService?wsdl"
@@ -458,21 +747,218 @@ class ISIMClient:
         else:
             date = Nil
 
-        r = client.service.suspendPersonAdvanced(
-            self.s, person_dn, include_accounts, date, justification
+        r = yield Call(
+            self.call,
+            client,
+            "suspendPersonAdvanced",
+            person_dn,
+            include_accounts,
+            date,
+            justification,
         )
         return r
 
+    @operation
     def get_request(self, request_id):
         # getRequest(session: ns1:WSSession, requestId: xsd:long) -> getRequestReturn: ns1:WSRequest
         url = self.addr + "WSRequestServiceService?wsdl"
         client = self.get_client(url)
-        r = client.service.getRequest(self.s, request_id)
+        r = yield Call(self.call, client, "getRequest", request_id)
         return r
 
+    @operation
     def abort_request(self, request_id, justification):
         # abortRequest(session: ns1:WSSession, requestId: xsd:long, justification: xsd:string) ->
         url = self.addr + "WSRequestServiceService?wsdl"
         client = self.get_client(url)
-        r = client.service.abortRequest(self.s, request_id, justification)
+        r = yield Call(self.call, client, "abortRequest", request_id, justification)
+        return r
+
+
+class ISIMClient(BaseClient):
+    def __init__(
+        self,
+        url,
+        user_,
+        pass_,
+        cert_path=None,
+        pool=None,
+        wsdl_cache=None,
+        state=None,
+        reauthenticate=True,
+        limiter=None,
+    ):
+
+        self.addr = url + "/itim/services/"
+        self.cert_path = cert_path
+        self.wsdl_cache = wsdl_cache
+        self.pool = pool or ConnectionPool()
+        # todos los clientes zeep comparten la misma sesión HTTP (y el pool de conexiones)
+        self.http = self.pool.session(cert_path)
+        self._client_locks = {}
+        self._client_locks_guard = threading.Lock()
+        # dn del servicio -> perfil de cuenta
+        self._account_profiles = {}
+        # (organización, nombre del flujo) -> DN
+        self._workflows = {}
+        self.reauthenticate = reauthenticate
+        self.limiter = limiter
+        self.__credentials = (user_, pass_)
+        self.__login_lock = threading.Lock()
+        if state and self.resume(state):
+            return
+        self.s = self.login(user_, pass_)
+
+    def login(self, user_, pass_):
+        assert self.cert_path is not None, "No certificate passed"
+        return run(self._login(user_, pass_))
+
+    def export_state(self):
+        return {"session": serialize_object(self.s, dict)}
+
+    def resume(self, state):
+        """
+        Retoma un WSSession exportado con export_state().
+        Retorna False si la sesión ya expiró en el servidor.
+        """
+        assert self.cert_path is not None, "No certificate passed"
+        if not self.__check_session(state["session"]):
+            return False
+
+        self.s = state["session"]
+        return True
+
+    def is_alive(self):
+        """
+        Verifica (con una sola llamada) que el WSSession siga activo en el servidor.
+        """
+        return self.__check_session(self.s)
+
+    def __check_session(self, session):
+        url = self.addr + "WSPersonServiceService?wsdl"
+        client = self.get_client(url)
+
+        try:
+            client.service.getPrincipalPerson(session)
+        except Fault:
+            return False
+        return True
+
+    def _relogin(self, session):
+        with self.__login_lock:
+            # otro hilo pudo haber renovado la sesión mientras tanto
+            if self.s is session:
+                self.s = self.login(*self.__credentials)
+
+    def _send(self, client, operation, *args):
+        if self.limiter is None:
+            return client.service[operation](*args)
+
+        with self.limiter.slot():
+            return client.service[operation](*args)
+
+    def __send_streaming(self, client, operation, *args):
+        # misma petición que zeep, pero sin leer ni deserializar la respuesta
+        binding = client.service._binding
+        envelope = client.create_message(client.service, operation, *args)
+        headers = {
+            "Content-Type": "text/xml; charset=utf-8",
+            "SOAPAction": f'"{binding.get(operation).soapaction or ""}"',
+        }
+        address = client.service._binding_options["address"]
+        data = etree.tostring(envelope, encoding="utf-8")
+
+        def post():
+            r = self.http.post(address, data=data, headers=headers, stream=True)
+            if r.status_code != 200:
+                # fault: zeep lo procesa y lanza la excepción (Fault si es de negocio, TransportError si no)
+                binding.process_reply(client, binding.get(operation), r)
+            return r
+
+        if self.limiter is None:
+            r = post()
+        else:
+            with self.limiter.slot():
+                r = post()
+
+        r.raw.decode_content = True
         return r
+
+    def iter_call(self, client, operation, *args):
+        """
+        Invoca una operación SOAP que retorna un arreglo y entrega los elementos a medida
+        que llegan, sin cargar la respuesta completa en memoria.
+
+        Los elementos son dicts con la misma forma que los objetos de zeep.
+        """
+        r = run(self._call(self.__send_streaming, client, operation, *args))
+        with r:
+            yield from _iter_encoded_array(r.raw)
+
+    def get_client(self, url):
+
+        # Si ya se inicializó el cliente especificado en client_name, lo devuelve. Si no, lo inicializa, setea y devuelve.
+        # ej. -> https://<ITIMURL>/.../WSSessionService?wsdl -> wssessionservice
+        client_name = url.split("/")[-1][:-5].lower()
+        client = getattr(self, client_name, None)
+        # siempre contra el servidor de este cliente (con balanceo, la URL puede venir de otro nodo)
+        url = self.addr + url.split("/")[-1]
+
+        if client is None:
+            # un lock por servicio: se pueden cargar varios WSDL en paralelo sin cargar dos veces el mismo
+            with self._client_locks_guard:
+                lock = self._client_locks.setdefault(client_name, threading.Lock())
+
+            with lock:
+                client = getattr(self, client_name, None)
+                if client is None:
+                    settings = Settings(strict=False)
+                    client = Client(
+                        url,
+                        settings=settings,
+                        transport=Transport(
+                            session=self.http, cache=self.wsdl_cache or InMemoryCache()
+                        ),
+                    )
+                    # necesario porque los WSDL de SIM queman el puerto y no funciona con balanceador
+                    client.service._binding_options["address"] = url[:-5]
+                    setattr(self, client_name, client)
+
+        return client
+
+    def preload(self, services="all", max_workers=None):
+        """
+        Carga en paralelo los clientes (WSDL) de los servicios indicados.
+
+        Acepta los nombres de soap.SERVICES (ej. WSPersonServiceService) o su versión corta (WSPersonService).
+        Si services="all", carga todos.
+        """
+        if services == "all":
+            services = SERVICES
+        elif isinstance(services, str):
+            services = [services]
+
+        urls = []
+        for name in services:
+            if name not in SERVICES and name + "Service" in SERVICES:
+                name = name + "Service"
+            if name not in SERVICES:
+                raise ValueError(
+                    f"Servicio SOAP desconocido: {name}. Servicios válidos: {SERVICES}"
+                )
+            urls.append(self.addr + name + "?wsdl")
+
+        if not urls:
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(urls)) as executor:
+            # list() para propagar cualquier error de carga
+            list(executor.map(self.get_client, urls))
+
+    def iter_search_accounts(self, search_arguments):
+        url = self.addr + "WSAccountServiceService?wsdl"
+        client = self.get_client(url)
+
+        search_arguments = {k: v for k, v in search_arguments.items() if v is not None}
+
+        yield from self.iter_call(client, "searchAccounts", search_arguments)
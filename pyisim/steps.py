@@ -0,0 +1,173 @@
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Generator, Iterable
+
+
+class Call:
+    """
+    A call an operation needs: fn(*args, **kwargs). Yielded by operations, performed by run() or arun().
+    """
+
+    def __init__(self, fn: Callable, *args, **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self) -> Any:
+        return self.fn(*self.args, **self.kwargs)
+
+
+class Parallel:
+    """
+    Calls (or sub-operations) an operation needs at the same time. Yields the list of their results, in order.
+    """
+
+    def __init__(self, steps: Iterable, max_workers: int = None):
+        """
+        Args:
+            steps (Iterable): Call instances or operation generators.
+            max_workers (int, optional): Maximum of them in flight. Defaults to None (all of them).
+        """
+        self.steps = list(steps)
+        self.max_workers = max_workers
+
+
+def run(steps: Generator) -> Any:
+    """
+    Performs an operation synchronously: every Call in the calling thread, Parallel ones in a thread pool.
+
+    Args:
+        steps (Generator): Operation generator. Yields Call, Parallel or other operation generators.
+
+    Returns:
+        Any: The operation result.
+    """
+    value, error = None, None
+    while True:
+        try:
+            step = steps.send(value) if error is None else steps.throw(error)
+        except StopIteration as e:
+            return e.value
+
+        value, error = None, None
+        try:
+            value = _run_step(step)
+        except Exception as e:
+            # la operación decide qué hacer con el error (ej. volver a autenticarse)
+            error = e
+
+
+def _run_step(step) -> Any:
+    if not isinstance(step, Parallel):
+        return _run_one(step)
+    if len(step.steps) <= 1:
+        # sin hilos para un solo paso
+        return [_run_one(s) for s in step.steps]
+
+    with ThreadPoolExecutor(
+        max_workers=step.max_workers or len(step.steps)
+    ) as executor:
+        return list(executor.map(_run_one, step.steps))
+
+
+def _run_one(step) -> Any:
+    if inspect.isgenerator(step):
+        return run(step)
+
+    result = step()
+    if inspect.isawaitable(result):
+        if inspect.iscoroutine(result):
+            result.close()
+        raise TypeError(
+            f"{getattr(step.fn, '__qualname__', step.fn)} is asynchronous: await the operation through an AsyncSession (pyisim.aio)."
+        )
+    return result
+
+
+async def arun(steps: Generator) -> Any:
+    """
+    Performs an operation on asyncio: awaits every Call that returns an awaitable, and gathers Parallel ones.
+
+    Args:
+        steps (Generator): Operation generator. Yields Call, Parallel or other operation generators.
+
+    Returns:
+        Any: The operation result.
+    """
+    value, error = None, None
+    while True:
+        try:
+            step = steps.send(value) if error is None else steps.throw(error)
+        except StopIteration as e:
+            return e.value
+
+        value, error = None, None
+        try:
+            value = await _arun_step(step)
+        except Exception as e:
+            error = e
+
+
+async def _arun_step(step) -> Any:
+    if not isinstance(step, Parallel):
+        return await _arun_one(step)
+
+    if step.max_workers is None:
+        return list(await asyncio.gather(*[_arun_one(s) for s in step.steps]))
+
+    semaphore = asyncio.Semaphore(step.max_workers)
+
+    async def limited(s):
+        async with semaphore:
+            return await _arun_one(s)
+
+    return list(await asyncio.gather(*[limited(s) for s in step.steps]))
+
+
+async def _arun_one(step) -> Any:
+    if inspect.isgenerator(step):
+        return await arun(step)
+
+    result = step()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def is_async(owner: Any) -> bool:
+    """
+    True if the operations of owner (a session or client) run on asyncio.
+    """
+    return getattr(owner, "_run", run) is arun
+
+
+def operation(steps: Callable = None, *, runner: int = 0) -> Callable:
+    """
+    Turns an operation generator function into a function that performs it.
+
+    The operation runs with the _run driver of its owner, the positional argument in position
+    runner (ex. a client or session, or the session of an entity method): run() by default,
+    so it returns the result, or arun() on asyncio, so it returns an awaitable.
+
+    Usage::
+
+        @operation
+        def lookup_container(self, dn):
+            client = self.get_client(...)
+            return (yield Call(self.call, client, "lookupContainer", dn))
+
+        @operation(runner=1)
+        def suspend(self, session, justification):
+            ...
+    """
+    if steps is None:
+        return functools.partial(operation, runner=runner)
+
+    @functools.wraps(steps)
+    def perform(*args, **kwargs):
+        owner = args[runner] if len(args) > runner else kwargs.get("session")
+        return getattr(owner, "_run", run)(steps(*args, **kwargs))
+
+    return perform
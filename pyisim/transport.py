@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from zeep.cache import Base
+
+
+class ConnectionPool:
+    """
+    HTTP connection pool shared by the ISIM REST client and every SOAP service client.
+
+    Each client still gets its own requests.Session (and cookie jar), but all of them mount
+    the same adapter, so TLS connections to ISIM are opened once and reused everywhere.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+        pool_block: bool = False,
+    ):
+        """
+        Args:
+            pool_connections (int, optional): Number of host pools to keep. Defaults to 10.
+            pool_maxsize (int, optional): Maximum connections kept alive per host. Defaults to 10.
+            keep_alive (bool, optional): Reuse connections between requests. Defaults to True.
+            pool_block (bool, optional): Wait for a free connection instead of opening a throwaway one when the pool is full. Defaults to False.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+
+    def session(self, cert_path: str = None) -> requests.Session:
+        """
+        Creates a requests.Session bound to the shared connection pool.
+
+        Args:
+            cert_path (str, optional): Path to application server root certificate. Defaults to None.
+
+        Returns:
+            requests.Session: HTTP session using the pooled adapter.
+        """
+        s = requests.Session()
+        s.verify = cert_path
+        s.mount("https://", self.adapter)
+        s.mount("http://", self.adapter)
+        if not self.keep_alive:
+            s.headers["Connection"] = "close"
+        return s
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        self.adapter.close()
+
+
+class WSDLCache(Base):
+    """
+    Persistent (SQLite) cache for ISIM WSDL and XSD documents.
+
+    Documents are keyed by URL and ISIM version, so upgrading the application server
+    only requires changing the version to stop serving stale schemas.
+    """
+
+    def __init__(self, path: str, isim_version: str = "", timeout: int = 86400):
+        """
+        Args:
+            path (str): Path to the SQLite cache file. Created if it does not exist.
+            isim_version (str, optional): ISIM version the cached documents belong to. Example: "7.0.2 FP2". Defaults to "".
+            timeout (int, optional): Seconds before a cached document expires. None never expires. Defaults to 86400 (a day).
+        """
+        self.path = path
+        self.isim_version = isim_version
+        self.timeout = timeout
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents "
+                "(version TEXT, url TEXT, created REAL, content BLOB, PRIMARY KEY (version, url))"
+            )
+
+    @contextmanager
+    def _connection(self):
+        with self._lock:
+            conn = sqlite3.connect(self.path)
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def add(self, url, content):
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (self.isim_version, url, time.time(), content),
+            )
+
+    def get(self, url):
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT created, content FROM documents WHERE version = ? AND url = ?",
+                (self.isim_version, url),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        created, content = row
+        if self.timeout is not None and time.time() - created > self.timeout:
+            return None
+        return content
+
+    def invalidate(self, url: str = None):
+        """
+        Removes cached documents of the current ISIM version.
+
+        Args:
+            url (str, optional): Only remove this document. Removes every document if None. Defaults to None.
+        """
+        with self._connection() as conn:
+            if url:
+                conn.execute(
+                    "DELETE FROM documents WHERE version = ? AND url = ?",
+                    (self.isim_version, url),
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM documents WHERE version = ?", (self.isim_version,)
+                )
@@ -1,10 +1,33 @@
 from typing import Dict, List, TYPE_CHECKING, Union
 
+from pyisim.exceptions import PersonNotFoundError
+
 if TYPE_CHECKING:
     from pyisim.auth import Session
     from pyisim.entities import Activity, Person, Service
 
 
+def escape_filter_value(value: str) -> str:
+    """
+    Escapes a value to use it inside an LDAP search filter (RFC 4515).
+
+    Args:
+        value (str): Attribute value. Example: "Pérez (contractor)"
+
+    Returns:
+        str: Escaped value. Example: "Pérez \\28contractor\\29"
+    """
+    for char, escaped in (
+        ("\\", r"\5c"),
+        ("*", r"\2a"),
+        ("(", r"\28"),
+        (")", r"\29"),
+        ("\0", r"\00"),
+    ):
+        value = value.replace(char, escaped)
+    return value
+
+
 def activity_batch_complete(
     session: "Session",
     actividades: List["Activity"],
@@ -67,11 +90,13 @@ def get_account_defaults(
         Dict: Default attributes for the account
     """
     if person:
-        if not hasattr(person, "dn"):
+        try:
+            dn = person.get_dn(session)
+        except PersonNotFoundError:
             raise KeyError("Person must have a reference to ISIM (DN). Search for it.")
 
         result = session.soapclient.get_default_account_attributes_by_person(
-            service.dn, person.dn
+            service.dn, dn
         )
     else:
         result = session.soapclient.get_default_account_attributes(service.dn)
@@ -0,0 +1,124 @@
+import dataclasses
+import random
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, List
+
+from pyisim.entities import Activity
+
+if TYPE_CHECKING:
+    from pyisim.auth import Session
+
+
+@dataclasses.dataclass
+class ActivityChanges:
+
+    added: List[Activity]
+    """
+    Activities pending since the last poll
+    """
+    removed: List[Activity]
+    """
+    Activities no longer pending (completed, escalated or out of the watched filter)
+    """
+
+
+class ActivityWatcher:
+    """
+    Long-lived feed of pending activity changes, for approval bots.
+
+    Keeps the last snapshot of pending activities keyed by ID and only builds Activity
+    objects for the ones that appear. Polls every interval seconds (with jitter) and backs
+    off up to max_interval while nothing changes.
+
+    Usage::
+
+        watcher = ActivityWatcher(session, search_filter="Aprobación*")
+        for changes in watcher.watch():
+            for activity in changes.added:
+                activity.complete(session, "approve", "Aprobado por el bot")
+    """
+
+    def __init__(
+        self,
+        session: "Session",
+        by: str = "activityName",
+        search_filter: str = "*",
+        interval: float = 10,
+        max_interval: float = 300,
+        backoff: float = 2.0,
+        jitter: float = 0.1,
+    ):
+        """
+        Args:
+            session (Session): Active ISIM Session
+            by (str, optional): Filter available in ISIMs REST API docs (activityId, activityName, serviceName, participantName). Defaults to "activityName".
+            search_filter (str, optional): Filter to search by. Defaults to "*".
+            interval (float, optional): Seconds between polls while activities keep changing. Defaults to 10.
+            max_interval (float, optional): Longest wait between polls when nothing changes. Defaults to 300.
+            backoff (float, optional): Factor the wait grows by after each poll without changes. Defaults to 2.0.
+            jitter (float, optional): Random variation of each wait, as a fraction of it. Defaults to 0.1.
+        """
+        self.session = session
+        self.by = by
+        self.search_filter = search_filter
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+
+        self.snapshot: Dict[str, Activity] = {}
+        self.__delay = interval
+        self.__stop = threading.Event()
+
+    def poll(self) -> ActivityChanges:
+        """
+        Searches the pending activities once and compares them with the last snapshot.
+
+        Returns:
+            ActivityChanges: Activities added and removed since the last poll.
+        """
+        results = self.session.restclient.search_activity(
+            search_attr=self.by, search_filter=self.search_filter
+        )
+        current = {a["_links"]["self"]["href"].split("/")[-1]: a for a in results}
+
+        added = [
+            Activity(self.session, activity=a)
+            for id, a in current.items()
+            if id not in self.snapshot
+        ]
+        removed = [a for id, a in self.snapshot.items() if id not in current]
+
+        snapshot = {id: a for id, a in self.snapshot.items() if id in current}
+        snapshot.update({a.href.split("/")[-1]: a for a in added})
+        self.snapshot = snapshot
+
+        if added or removed:
+            self.__delay = self.interval
+        else:
+            self.__delay = min(self.max_interval, self.__delay * self.backoff)
+
+        return ActivityChanges(added=added, removed=removed)
+
+    def watch(self) -> Iterator[ActivityChanges]:
+        """
+        Polls until stop() is called, yielding only the polls with changes.
+        The first poll yields every pending activity as added.
+
+        Yields:
+            ActivityChanges: Activities added and removed since the previous poll.
+        """
+        self.__stop.clear()
+        while not self.__stop.is_set():
+            changes = self.poll()
+            if changes.added or changes.removed:
+                yield changes
+
+            delay = self.__delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self.__stop.wait(delay)
+
+    def stop(self) -> None:
+        """
+        Stops watch() after the current wait (can be called from another thread).
+        """
+        self.__stop.set()
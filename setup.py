@@ -15,7 +15,7 @@ AUTHOR = "Andrés Zamora"
 REQUIRES_PYTHON = ">=3.8.0"
 VERSION = "0.3.1"  # Get the version from the package __init__.py
 REQUIRED = ["requests >= 2.23.0", "zeep >= 3.4.0"]
-EXTRAS = {}
+EXTRAS = {"async": ["httpx >= 0.20", "zeep[async] >= 4.1.0"]}
 
 here = os.path.abspath(os.path.dirname(__file__))
 
@@ -1,11 +1,17 @@
 # type: ignore
+import asyncio
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
 import pytest
+import requests
 from pyisim import search
-from pyisim.auth import Session
+from pyisim.auth import Session, SessionPool
+from pyisim.cache import IdentityMap
 from pyisim.entities import (
+    Activity,
     DynamicRole,
     Person,
     ProvisioningPolicy,
@@ -15,8 +21,11 @@ from pyisim.entities import (
     Access,
 )
 from pyisim.entities.role import RoleAttributes
-from pyisim.exceptions import NotFoundError
+from pyisim.exceptions import NotFoundError, SizeLimitExceededError
+from pyisim.limiter import ConcurrencyLimiter
+from pyisim.transport import ConnectionPool, WSDLCache
 from pyisim.utils import get_account_defaults
+from pyisim.watch import ActivityWatcher
 from secret import (
     admin_login,
     admin_pw,
@@ -47,6 +56,154 @@ def test_search_people(session):
     assert len(r) > 0
 
 
+def test_search_people_dn(session):
+    r = search.people(session, search_filter="a*", attributes="cn", limit=5)
+
+    assert all("dn" in p.__dict__ for p in r)
+
+
+def test_person_dn_lookup(session):
+    href = search.people(session, search_filter="a*", attributes="cn", limit=1)[0].href
+    p = Person(session, href=href)
+    embedded = Person(
+        session, person={"_links": {"self": {"href": href}}, "_attributes": {}}
+    )
+
+    assert "dn" not in embedded.__dict__
+    assert p.get_dn(session)
+    assert embedded.get_dn(session) == p.dn
+
+
+def test_lazy_person(session):
+    p = search.people(
+        session, by="employeenumber", search_filter="1015463230", lazy=True
+    )[0]
+
+    assert "employeenumber" not in p.__dict__
+    assert p.employeenumber == "1015463230"
+    assert p.changes == {}
+
+    q = search.people(
+        session, by="employeenumber", search_filter="1015463230", lazy=True
+    )[0]
+    q.title = "changed"
+    assert "employeenumber" not in q.__dict__
+    assert q.changes == {"title": "changed"}
+    assert q.employeenumber == "1015463230"
+    assert q.title == "changed"
+
+    r = search.people(
+        session, by="employeenumber", search_filter="1015463230", lazy=True, roles=True
+    )[0]
+    assert "erroles" in r.__dict__ and "employeenumber" not in r.__dict__
+    assert isinstance(r.embedded["roles"], list)
+
+
+def test_iter_people(session):
+    people = search.iter_people(session, attributes="cn", page_size=5)
+
+    first = [next(people) for _ in range(12)]
+    assert len({p.href for p in first}) == 12
+
+
+def test_iter_people_unpaged():
+    # un servidor que ignora Range no devuelve Content-Range
+    page = [
+        {"_links": {"self": {"href": f"/itim/rest/people/{i}"}}, "_attributes": {}}
+        for i in range(5)
+    ]
+    restclient = SimpleNamespace(search_people_page=lambda *a, **kw: (page, None))
+    session = SimpleNamespace(restclient=restclient, identity_map=None)
+
+    assert len(list(search.iter_people(session, page_size=10))) == 5
+    with pytest.raises(SizeLimitExceededError):
+        list(search.iter_people(session, page_size=5))
+
+
+def test_partitioned_search(session):
+    full = search.people(session, search_filter="a*", limit=10, partitioned=True)
+    assert len({p.dn.lower() for p in full}) == len(full)
+    assert len(full) >= len(search.people(session, search_filter="a*", limit=10))
+
+    accounts = search.account(
+        session, "(uid=a*)", partition_by="uid", size_limit=20, max_workers=4
+    )
+    assert len({a.dn for a in accounts}) == len(accounts)
+
+    with pytest.raises(SizeLimitExceededError):
+        search.people(
+            session,
+            search_filter="a*",
+            limit=1,
+            partitioned=True,
+            alphabet="a",
+            remainder_limit=1,
+        )
+
+
+def test_iter_account(session):
+    streamed = [a.dn for a in search.iter_account(session, "(eruid=a*)")]
+    assert sorted(streamed) == sorted(
+        a.dn for a in search.account(session, "(eruid=a*)")
+    )
+
+
+def test_search_account_by_service(session):
+    parent = search.organizational_container(session, "organizations", test_org)[0]
+    service = search.service(session, parent)[0]
+
+    accounts = search.account(session, "(eruid=*)", service=service)
+    assert all(a.service_name == service.name for a in accounts)
+    assert service.dn.lower() in session.soapclient._account_profiles
+
+
+def test_activity_watcher(session):
+    watcher = ActivityWatcher(session, interval=0.1)
+
+    first = watcher.poll()
+    assert len(watcher.snapshot) == len(first.added)
+    assert first.removed == []
+
+    second = watcher.poll()
+    assert len(watcher.snapshot) == len(first.added) + len(second.added) - len(
+        second.removed
+    )
+
+
+def test_identity_map():
+    s = Session(test_url, admin_login, admin_pw, cert, identity_map=IdentityMap())
+
+    first = search.roles(s, search_filter="SAP*")[0]
+    second = search.roles(s, search_filter="SAP*")[0]
+
+    assert first.parent is second.parent
+    assert s.identity_map.stats()["hits"] > 0
+
+
+def test_preload_containers():
+    s = Session(test_url, admin_login, admin_pw, cert)
+    assert s.preload_containers() > 0
+
+    ou = search.organizational_container(s, "organizations", test_org)[0]
+    assert s.container_cache.get(ou.dn)["href"] == ou.href
+
+
+def test_search_people_roles(session):
+    people = search.people(
+        session, search_filter="a*", attributes="erroles", roles=True, limit=5
+    )
+
+    for p in people:
+        assert [r.dn.lower() for r in p.embedded["roles"]] == [
+            dn.lower() for dn in p.erroles
+        ]
+
+
+def test_preload_workflows(session):
+    assert session.soapclient.preload_workflows(test_org) > 0
+    assert session.soapclient._workflows
+
+
 def test_search_service(session):
     r = search.service(
         session,
@@ -57,12 +214,25 @@ def test_search_service(session):
     assert r[0].name == "SAP NW"
 
 
+def test_bulk_lookup(session):
+    people = search.people_by_values(
+        session, "employeenumber", ["1015463230", "no-existe*"]
+    )
+    assert list(people) == ["1015463230"]
+    assert people["1015463230"].dn
+
+    names = [r.name for r in search.roles(session, search_filter="SAP*")[:5]]
+    roles = search.roles_by_values(session, "errolename", names, chunk_size=2)
+    assert set(roles) == set(names)
+
+
 def test_search_roles(session):
     r = search.roles(session, search_filter="SAP*")
 
     assert len(r) > 0
     assert "SAP" in r[0].name.upper()
     assert "ou=roles" in r[0].dn
+    assert r[0].parent.dn == r[0].parent_dn
 
 
 def test_new_rol(session):
@@ -152,6 +322,190 @@ def test_get_client():
     s.soapclient.login(admin_login, admin_pw)
 
 
+def test_shared_connection_pool():
+    pool = ConnectionPool(pool_maxsize=4)
+    s = Session(test_url, admin_login, admin_pw, cert, pool=pool)
+
+    search.roles(s, search_filter="ITIM Administrators")
+    search.people(s, by="employeenumber", search_filter="1015463230", limit=1)
+
+    assert s.restclient.s.get_adapter(test_url) is pool.adapter
+    assert s.soapclient.http.get_adapter(test_url) is pool.adapter
+
+
+def test_wsdl_cache(tmp_path):
+    cache = WSDLCache(str(tmp_path / "wsdl.db"), isim_version="7.0.2")
+    s = Session(test_url, admin_login, admin_pw, cert, wsdl_cache=cache)
+    search.roles(s, search_filter="ITIM Administrators")
+
+    url = s.soapclient.addr + "WSRoleServiceService?wsdl"
+    assert cache.get(url) is not None
+
+    cache.invalidate(url)
+    assert cache.get(url) is None
+
+
+def test_preload_services():
+    s = Session(test_url, admin_login, admin_pw, cert, preload="all")
+    assert s.soapclient.wspersonserviceservice is not None
+    assert s.soapclient.wsroleserviceservice is not None
+
+    s = Session(
+        test_url, admin_login, admin_pw, cert, preload=["WSAccountService"]
+    )
+    assert s.soapclient.wsaccountserviceservice is not None
+
+
+def test_lazy_login():
+    s = Session(test_url, admin_login, admin_pw, cert, lazy=True)
+    assert not s._restclients and not s._soapclients
+
+    r = search.people(s, by="employeenumber", search_filter="1015463230", limit=1)
+    assert len(r) > 0
+    assert s._restclients
+    assert not s._soapclients
+
+
+def test_save_resume_session(tmp_path):
+    path = str(tmp_path / "session.json")
+    s = Session(test_url, admin_login, admin_pw, cert, session_file=path)
+    s.save()
+
+    resumed = Session(test_url, admin_login, admin_pw, cert, session_file=path)
+    assert resumed.restclient.CSRF == s.restclient.CSRF
+    assert resumed.soapclient.s["sessionID"] == s.soapclient.s["sessionID"]
+
+    r = search.people(
+        resumed, by="employeenumber", search_filter="1015463230", limit=1
+    )
+    assert len(r) > 0
+
+
+def test_reauthenticate(session):
+    old_csrf = session.restclient.CSRF
+
+    # simula la expiración de la sesión REST
+    session.restclient.s.cookies.clear()
+    r = search.people(session, by="employeenumber", search_filter="1015463230", limit=1)
+
+    assert len(r) > 0
+    assert session.restclient.CSRF != old_csrf
+
+
+def test_async_session():
+    # dependencia opcional: pip install pyisim[async]
+    pytest.importorskip("httpx")
+    from pyisim.aio import AsyncSession
+
+    async def main():
+        async with AsyncSession(test_url, admin_login, admin_pw, cert) as s:
+            people = await s.search.people(
+                by="employeenumber", search_filter="1015463230", limit=1
+            )
+            accounts = await asyncio.gather(*[s.get_accounts(p) for p in people])
+            paged = [p async for p in s.search.iter_people(search_filter="a*")]
+            # las funciones de búsqueda y los métodos de las entidades también corren en el event loop
+            found = await search.people(
+                s, by="employeenumber", search_filter="1015463230", limit=1
+            )
+            own = await found[0].get_accounts(s)
+            return people, accounts, paged, own
+
+    people, accounts, paged, own = asyncio.run(main())
+    assert len(people) > 0
+    assert len(accounts) == len(people)
+    assert len(paged) > 0
+    assert [a.dn for a in own] == [a.dn for a in accounts[0]]
+
+
+def test_session_pool():
+    pool = SessionPool(test_url, admin_login, admin_pw, cert, max_size=2)
+
+    def work(_):
+        with pool.session() as s:
+            return search.people(
+                s, by="employeenumber", search_filter="1015463230", limit=1
+            )
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(work, range(8)))
+
+    assert all(len(r) > 0 for r in results)
+    stats = pool.stats()
+    assert stats["created"] <= 2
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] == 8
+
+
+def test_load_balancing():
+    unreachable = "https://127.0.0.1:9"
+    s = Session([test_url, unreachable], admin_login, admin_pw, cert, lazy=True)
+
+    for _ in range(4):
+        r = search.people(s, by="employeenumber", search_filter="1015463230", limit=1)
+        assert len(r) > 0
+
+    stats = s.balancer.stats()
+    assert stats[unreachable]["ejected"]
+    assert stats[test_url]["calls"] >= 4
+
+
+def test_load_balancing_node_down_at_login():
+    unreachable = "https://127.0.0.1:9"
+    s = Session([unreachable, test_url], admin_login, admin_pw, cert)
+
+    assert s.balancer.stats()[unreachable]["ejected"]
+    r = search.people(s, by="employeenumber", search_filter="1015463230", limit=1)
+    assert len(r) > 0
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        Session([unreachable, "https://127.0.0.1:7"], admin_login, admin_pw, cert)
+
+
+def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(initial_limit=2, max_limit=8)
+    s = Session(test_url, admin_login, admin_pw, cert, limiter=limiter)
+
+    def work(_):
+        return search.people(
+            s, by="employeenumber", search_filter="1015463230", limit=1
+        )
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(work, range(20)))
+
+    assert all(len(r) > 0 for r in results)
+    stats = limiter.stats()
+    assert 1 <= stats["limit"] <= 8
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_concurrency_limiter_fast_failures():
+    limiter = ConcurrencyLimiter(initial_limit=2, max_limit=8)
+
+    def call(seconds, error=None):
+        with limiter.slot():
+            time.sleep(seconds)
+            if error:
+                raise error
+
+    for _ in range(200):
+        call(0.01)
+    assert limiter.limit == 8
+    baseline = limiter.stats()["baseline_latency"]
+
+    for _ in range(20):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            call(0, requests.exceptions.ConnectionError())
+    assert limiter.limit == 1
+    # las fallas no cambian la latencia de referencia
+    assert limiter.stats()["baseline_latency"] == baseline
+
+    for _ in range(200):
+        call(0.01)
+    assert limiter.limit == 8
+
+
 def test_inicializar_politicas(session):
 
     parent = search.organizational_container(session, "organizations", test_org)[0]
@@ -457,6 +811,27 @@ def test_activites_by_request_id(session):
     print(res)
 
 
+def test_activities_from_ws_activity(session):
+    request_id = "5101169363690384727"
+    ws_activities = session.soapclient.get_request_activities(request_id)
+    activities = search.activities(session, by="requestId", search_filter=request_id)
+
+    assert [a.href.split("/")[-1] for a in activities] == [
+        str(a.id) for a in ws_activities
+    ]
+    for a in activities:
+        assert "workitem_href" not in a.__dict__
+    # la primera lectura completa todo el lote
+    assert activities[0].type
+    assert all("workitem_href" in a.__dict__ for a in activities)
+    assert getattr(activities[0], "missing", None) is None
+
+    for a in activities:
+        looked_up = Activity(session, id=a.href.split("/")[-1])
+        assert a.workitem_href == looked_up.workitem_href
+        assert a.type == looked_up.type
+
+
 def test_search_ou(session):
     name = test_org
     search.organizational_container(session, "organizations", name)